@@ -0,0 +1,158 @@
+import threading
+import time
+from enum import IntEnum
+
+from core.decision_engine import DecisionAction
+from core.risk_engine import RiskLevel
+
+
+class DegradationLevel(IntEnum):
+    """
+    Overload steps; each level also applies every level below it
+    """
+    NORMAL = 0
+    SKIP_OPTIONAL = 1     # skip optional ML/SHAP stages
+    REDUCED_DECODE = 2    # decode at a lower pixel budget
+    SAMPLED_AUDIT = 3     # only sample ALLOW decisions into the audit log
+    SHED = 4              # reject immediately with a WARN
+
+
+class QRAdmissionController:
+    """
+    Admission control and stepwise degradation around QRDecisionEngine
+    """
+
+    # (pressure upper bound, level) for latency/queue pressure below shedding.
+    # Pressure is the larger of inflight / max_inflight and, once at least
+    # latency_min_inflight other scans are running, smoothed latency /
+    # latency_target_ms.
+    PRESSURE_LEVELS = (
+        (0.5, DegradationLevel.NORMAL),
+        (0.75, DegradationLevel.SKIP_OPTIONAL),
+        (1.0, DegradationLevel.REDUCED_DECODE),
+    )
+
+    SHED_REASON = "Service under heavy load"
+
+    def __init__(
+        self,
+        engine,
+        max_inflight: int = 32,
+        latency_target_ms: float = 300.0,
+        latency_smoothing: float = 0.2,
+        latency_min_inflight: int = 2,
+        reduced_pixel_budget: int = 2_000_000,
+        audit_sample_rate: float = 0.1
+    ):
+        """
+        Args:
+            engine (QRDecisionEngine): Engine that performs the analysis
+            max_inflight (int): Concurrent scans at which new scans are shed
+            latency_target_ms (float): Smoothed scan latency considered full load
+            latency_smoothing (float): Weight of the newest sample in the
+                exponentially weighted latency average
+            latency_min_inflight (int): Other scans that must be in flight
+                before latency counts as pressure; slow inputs (large images,
+                the fallback chain) on an otherwise idle service are not overload
+            reduced_pixel_budget (int): Decoder pixel budget from REDUCED_DECODE up
+            audit_sample_rate (float): Fraction of ALLOW decisions audited
+                from SAMPLED_AUDIT up
+        """
+        self.engine = engine
+        self.max_inflight = max_inflight
+        self.latency_target_ms = latency_target_ms
+        self.latency_smoothing = latency_smoothing
+        self.latency_min_inflight = latency_min_inflight
+        self.reduced_pixel_budget = reduced_pixel_budget
+        self.audit_sample_rate = audit_sample_rate
+
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._latency_ms = 0.0
+        self._level_counts = {level.name: 0 for level in DegradationLevel}
+
+    # ---------- PUBLIC API ----------
+
+    def analyze_qr(self, image_path: str) -> dict:
+        """
+        Analyzes a QR image at the degradation level the current load allows
+        """
+        with self._lock:
+            level = self._level()
+            self._level_counts[level.name] += 1
+
+            if level == DegradationLevel.SHED:
+                return self._shed_decision()
+
+            self._inflight += 1
+
+        start = time.perf_counter()
+        try:
+            result = self.engine.analyze_qr(image_path, **self._scan_options(level))
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._inflight -= 1
+                self._latency_ms += self.latency_smoothing * (elapsed_ms - self._latency_ms)
+
+        result["degradation_level"] = level.name
+        return result
+
+    def current_level(self) -> DegradationLevel:
+        with self._lock:
+            return self._level()
+
+    def metrics(self) -> dict:
+        """
+        Snapshot of load signals and how many scans ran at each level
+        """
+        with self._lock:
+            return {
+                "degradation_level": self._level().name,
+                "inflight": self._inflight,
+                "latency_ms": round(self._latency_ms, 3),
+                "scans_by_level": dict(self._level_counts),
+            }
+
+    # ---------- INTERNAL HELPERS ----------
+
+    def _level(self) -> DegradationLevel:
+        # Shedding is driven by queue depth only: shed scans record no
+        # latency, so a latency trigger could never recover on its own
+        if self._inflight >= self.max_inflight:
+            return DegradationLevel.SHED
+
+        pressure = self._inflight / self.max_inflight
+        if self._inflight >= self.latency_min_inflight:
+            pressure = max(pressure, self._latency_ms / self.latency_target_ms)
+
+        for upper_bound, level in self.PRESSURE_LEVELS:
+            if pressure < upper_bound:
+                return level
+
+        return DegradationLevel.SAMPLED_AUDIT
+
+    def _scan_options(self, level: DegradationLevel) -> dict:
+        options = {}
+
+        if level >= DegradationLevel.SKIP_OPTIONAL:
+            options["skip_stages"] = self.engine.OPTIONAL_STAGES
+
+        if level >= DegradationLevel.REDUCED_DECODE:
+            options["pixel_budget"] = self.reduced_pixel_budget
+
+        if level >= DegradationLevel.SAMPLED_AUDIT:
+            options["audit_sample_rate"] = self.audit_sample_rate
+
+        return options
+
+    def _shed_decision(self) -> dict:
+        # Not audited: a synchronous write per rejected scan is exactly
+        # the load being shed. Shed volume is reported through metrics().
+        result = self.engine.explain_engine.generate({
+            "decision": DecisionAction.WARN,
+            "risk_level": RiskLevel.MEDIUM.value,
+            "reasons": [self.SHED_REASON]
+        })
+        result["degradation_level"] = DegradationLevel.SHED.name
+        return result
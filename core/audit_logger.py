@@ -1,3 +1,4 @@
+import hashlib
 import json
 from datetime import datetime
 from pathlib import Path
@@ -8,11 +9,30 @@ class QRAuditLogger:
     Records security decisions for traceability and compliance
     """
 
-    def __init__(self, log_file: str = "logs/qr_audit.log"):
+    def __init__(
+        self,
+        log_file: str = "logs/qr_audit.log",
+        include_payload: bool = False,
+        include_timeline: bool = False
+    ):
+        """
+        Args:
+            log_file (str): Path of the JSON-lines audit log
+            include_payload (bool): Store the raw payload so the decision can be replayed
+            include_timeline (bool): Store the decision timeline (per-stage latency)
+        """
         self.log_path = Path(log_file)
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.include_payload = include_payload
+        self.include_timeline = include_timeline
 
-    def log(self, decision_result: dict):
+    def log(
+        self,
+        decision_result: dict,
+        payload: str = None,
+        timeline: list = None,
+        versions: dict = None
+    ):
         """
         Append a security decision to the audit log
         """
@@ -25,5 +45,16 @@ class QRAuditLogger:
             "reasons": decision_result.get("why_dangerous", []),
         }
 
+        if payload is not None:
+            record["payload_sha256"] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            if self.include_payload:
+                record["payload"] = payload
+
+        if versions:
+            record.update(versions)
+
+        if timeline is not None and self.include_timeline:
+            record["decision_timeline"] = timeline
+
         with open(self.log_path, "a", encoding="utf-8") as f:
             f.write(json.dumps(record) + "\n")
@@ -1,3 +1,6 @@
+import random
+import time
+
 from core.qr_decoder import QRDecoder, QRDecodeError
 from core.payload_classifier import QRPayloadClassifier, PayloadType
 from core.upi_parser import UPIParser, UPIParseError
@@ -5,9 +8,12 @@ from core.risk_engine import QRHeuristicRiskEngine, RiskLevel
 from core.explainability_engine import QRExplainabilityEngine
 from core.feature_extractor import QRFeatureExtractor
 from core.ml_risk_scorer import MLRiskScorer
+from core.ml_xai import MLExplainabilityEngine
 from core.scam_classifier import QRScamClassifier
 from core.audit_logger import QRAuditLogger
 from core.decision_timeline import DecisionTimeline
+from core.pipeline import PipelineStage, StagePipeline
+from core.scan_profiler import ScanProfiler
 
 
 class DecisionAction:
@@ -17,7 +23,44 @@ class DecisionAction:
 
 
 class QRDecisionEngine:
-    def __init__(self):
+    # Stages that only add signal on top of the heuristic verdict
+    OPTIONAL_STAGES = ("ML_SCORING", "ML_EXPLAIN")
+
+    # Stages whose outputs no other stage requires; every other stage
+    # is needed to reach a verdict
+    SKIPPABLE_STAGES = OPTIONAL_STAGES + ("SCAM_CLASSIFICATION",)
+
+    ML_HIGH_RISK = 0.8
+    ML_MODERATE_RISK = 0.5
+
+    def __init__(
+        self,
+        audit_logger: QRAuditLogger = None,
+        disabled_stages: tuple = (),
+        max_workers: int = 4,
+        stage_timing: bool = False,
+        profiler: ScanProfiler = None,
+        enable_ml: bool = False,
+        ml_scorer: MLRiskScorer = None
+    ):
+        """
+        Args:
+            audit_logger (QRAuditLogger): Audit sink, defaults to logs/qr_audit.log
+            disabled_stages (tuple): Pipeline stage names never to run, from
+                SKIPPABLE_STAGES
+            max_workers (int): Threads used to run independent stages in parallel
+            stage_timing (bool): Add per-stage wall-clock timings to each result
+            profiler (ScanProfiler): Optional sampled profiling and slow-scan capture
+            enable_ml (bool): Run the ML_SCORING and ML_EXPLAIN stages. ML adds
+                reasons and can raise ALLOW to WARN, so it changes verdicts
+            ml_scorer (MLRiskScorer): Scorer to use instead of loading the
+                default model, e.g. MLRiskScorer(mmap_mode="r")
+
+        Raises:
+            ValueError: If disabled_stages names a required or unknown stage
+        """
+        self._check_skippable(disabled_stages, "disabled_stages")
+
         self.decoder = QRDecoder()
         self.classifier = QRPayloadClassifier()
         self.upi_parser = UPIParser()
@@ -26,16 +69,76 @@ class QRDecisionEngine:
 
         # Optional ML components
         self.feature_extractor = QRFeatureExtractor()
-        self.ml_scorer = MLRiskScorer()
+        self.enable_ml = enable_ml
+        self.ml_scorer = ml_scorer or MLRiskScorer()
+        self.ml_xai = self._build_ml_xai() if enable_ml else None
 
         # Intelligence layers
         self.scam_classifier = QRScamClassifier()
-        self.audit_logger = QRAuditLogger()
+        self.audit_logger = audit_logger or QRAuditLogger()
 
-    def analyze_qr(self, image_path: str) -> dict:
+        # Recorded with every audit entry so decisions can be tied
+        # to the rule set and model that produced them
+        self.versions = {
+            "rules_version": self.risk_engine.RULES_VERSION,
+            "model_version": self.ml_scorer.model_version if self._ml_enabled() else None
+        }
+
+        self.stage_timing = stage_timing
+        self.profiler = profiler
+        self.pipeline = StagePipeline(
+            self._build_stages(disabled_stages),
+            halt_when=self._is_definitive,
+            max_workers=max_workers,
+            on_stage_start=self._start_stage
+        )
+        self._stage_order = {
+            name: order for order, name in enumerate(self.pipeline.stage_names())
+        }
+
+    def analyze_qr(
+        self,
+        image_path: str,
+        skip_stages: tuple = (),
+        pixel_budget: int = None,
+        audit_sample_rate: float = 1.0
+    ) -> dict:
         """
         End-to-end QR security analysis with decision replay timeline
+
+        Args:
+            image_path (str): Path to QR image
+            skip_stages (tuple): Pipeline stages to leave out of this scan,
+                from SKIPPABLE_STAGES
+            pixel_budget (int): Overrides the decoder's pixel budget for this scan
+            audit_sample_rate (float): Fraction of ALLOW decisions written to the
+                audit log; WARN and BLOCK are always written
         """
+        final_result, _ = self.scan_qr(
+            image_path,
+            skip_stages=skip_stages,
+            pixel_budget=pixel_budget,
+            audit_sample_rate=audit_sample_rate
+        )
+        return final_result
+
+    def scan_qr(
+        self,
+        image_path: str,
+        skip_stages: tuple = (),
+        pixel_budget: int = None,
+        audit_sample_rate: float = 1.0
+    ) -> tuple:
+        """
+        Same as analyze_qr, but also returns the decoded payload
+
+        Returns:
+            tuple: (final result, payload or None if decoding failed)
+
+        Raises:
+            ValueError: If skip_stages names a required or unknown stage
+        """
+        self._check_skippable(skip_stages, "skip_stages")
 
         timeline = DecisionTimeline()
         timeline.add_step(
@@ -43,12 +146,191 @@ class QRDecisionEngine:
             description="QR code scanned by user"
         )
 
+        context = {
+            "image_path": image_path,
+            "pixel_budget": pixel_budget,
+            "timeline": timeline
+        }
+        final_result = None
+        audit_start = None
+        capture = None
+        error = None
+
         try:
-            payload = self.decoder.decode_qr(image_path)
+            capture = self.profiler.start_scan() if self.profiler else None
+
+            # Before Python 3.12 cProfile only sees the calling thread, so
+            # profiled scans run inline
+            final_result = self._run_pipeline(
+                context,
+                skip=skip_stages,
+                parallel=capture is None or not capture.sampled
+            )
+
+            audit_start = time.perf_counter()
+            if final_result["decision"] != DecisionAction.ALLOW or random.random() < audit_sample_rate:
+                self.audit(final_result, context.get("payload"), timeline)
+
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+
+        finally:
+            # A scan that raises must still stop its profiler and release
+            # its share of tracemalloc
+            if capture is not None:
+                stage_timings = dict(context.get("stage_timings", {}))
+                if audit_start is not None:
+                    stage_timings["AUDIT"] = round((time.perf_counter() - audit_start) * 1000, 3)
+
+                self.profiler.finish_scan(
+                    capture,
+                    image_path=image_path,
+                    payload=context.get("payload"),
+                    result=final_result,
+                    timeline=timeline.export(),
+                    stage_timings=stage_timings,
+                    error=error
+                )
+
+        return final_result, context.get("payload")
+
+    def analyze_payload(self, payload: str, timeline: DecisionTimeline = None) -> dict:
+        """
+        Security analysis of an already decoded QR payload.
+
+        Deterministic for a given payload, rule set and model, and does not
+        write to the audit log, so it is also the entry point for replay.
+        """
+
+        if timeline is None:
+            timeline = DecisionTimeline()
+
+        return self._run_pipeline({"payload": payload, "timeline": timeline})
+
+    def audit(self, final_result: dict, payload: str = None, timeline: DecisionTimeline = None):
+        """
+        Writes a decision to the audit log together with the rule/model versions
+        """
+        self.audit_logger.log(
+            final_result,
+            payload=payload,
+            timeline=timeline.export() if timeline is not None else None,
+            versions=self.versions
+        )
+
+    # ---------- PIPELINE ----------
+
+    def _build_stages(self, disabled_stages: tuple) -> list:
+        stages = [
+            PipelineStage(
+                "DECODE", self._stage_decode,
+                inputs=("image_path",),
+                outputs=("payload", "response", "error")
+            ),
+            PipelineStage(
+                "CLASSIFY", self._stage_classify,
+                inputs=("payload",),
+                outputs=("payload_type",)
+            ),
+            PipelineStage(
+                "PARSE", self._stage_parse,
+                inputs=("payload", "payload_type"),
+                outputs=("upi_data", "response", "error")
+            ),
+            PipelineStage(
+                "RISK_ANALYSIS", self._stage_risk_analysis,
+                inputs=("payload", "payload_type"),
+                optional_inputs=("upi_data",),
+                outputs=("risk_response",)
+            ),
+            PipelineStage(
+                "ML_SCORING", self._stage_ml_scoring,
+                inputs=("upi_data",),
+                outputs=("ml_risk", "upi_features"),
+                enabled=self._ml_enabled()
+            ),
+            PipelineStage(
+                "VERDICT", self._stage_verdict,
+                inputs=("risk_response",),
+                optional_inputs=("ml_risk",),
+                outputs=("response",),
+                always_run=True
+            ),
+            PipelineStage(
+                "SCAM_CLASSIFICATION", self._stage_scam_classification,
+                inputs=("response", "payload_type"),
+                outputs=("scam_category",),
+                always_run=True
+            ),
+            PipelineStage(
+                "ML_EXPLAIN", self._stage_ml_explain,
+                inputs=("response", "upi_features"),
+                outputs=("ml_reasons",),
+                enabled=self.ml_xai is not None
+            ),
+            PipelineStage(
+                "EXPLAIN", self._stage_explain,
+                inputs=("response",),
+                optional_inputs=("scam_category", "ml_reasons"),
+                outputs=("final_result",),
+                always_run=True
+            ),
+        ]
+
+        for stage in stages:
+            if stage.name in disabled_stages:
+                stage.enabled = False
+
+        return stages
+
+    def _check_skippable(self, stage_names: tuple, argument: str):
+        invalid = sorted(set(stage_names) - set(self.SKIPPABLE_STAGES))
+        if invalid:
+            raise ValueError(
+                f"{argument} may only name {list(self.SKIPPABLE_STAGES)}, got {invalid}"
+            )
+
+    def _start_stage(self, stage: PipelineStage, context: dict):
+        context["timeline"].start_stage(self._stage_order[stage.name])
+
+    def _run_pipeline(self, context: dict, skip: tuple = (), parallel: bool = True) -> dict:
+        timings = self.pipeline.run(context, skip=skip, parallel=parallel)
+        context["stage_timings"] = timings
+
+        final_result = context["final_result"]
+        if self.stage_timing:
+            final_result["stage_timings_ms"] = timings
+
+        return final_result
+
+    def _is_definitive(self, context: dict) -> bool:
+        """
+        A failed decode/parse or a heuristic BLOCK cannot be softened by
+        later stages, so the remaining optional work is skipped
+        """
+        if context.get("error"):
+            return True
+
+        risk_response = context.get("risk_response")
+        return bool(risk_response) and risk_response["decision"] == DecisionAction.BLOCK
+
+    # ---------- STAGES ----------
+
+    def _stage_decode(self, context: dict) -> dict:
+        timeline = context["timeline"]
+
+        try:
+            payload = self.decoder.decode_qr(
+                context["image_path"],
+                pixel_budget=context.get("pixel_budget")
+            )
             timeline.add_step(
                 stage="DECODE",
                 description="QR code decoded successfully"
             )
+            return {"payload": payload}
+
         except QRDecodeError as e:
             timeline.add_step(
                 stage="DECODE",
@@ -57,11 +339,35 @@ class QRDecisionEngine:
             )
             return self._block_decision("QR decoding failed", str(e), timeline)
 
-        payload_type = self.classifier.classify(payload)
-        timeline.add_step(
+    def _stage_classify(self, context: dict) -> dict:
+        payload_type = self.classifier.classify(context["payload"])
+        context["timeline"].add_step(
             stage="CLASSIFY",
             description=f"QR classified as {payload_type}"
         )
+        return {"payload_type": payload_type}
+
+    def _stage_parse(self, context: dict) -> dict:
+        if context["payload_type"] != PayloadType.UPI:
+            return {}
+
+        try:
+            return {"upi_data": self.upi_parser.parse(context["payload"])}
+
+        except UPIParseError as e:
+            context["timeline"].add_step(
+                stage="PARSE",
+                description="UPI parsing failed",
+                outcome=str(e)
+            )
+            return self._block_decision(
+                "Invalid or unsafe UPI QR",
+                str(e),
+                context["timeline"]
+            )
+
+    def _stage_risk_analysis(self, context: dict) -> dict:
+        payload_type = context["payload_type"]
 
         response = {
             "payload_type": payload_type,
@@ -73,92 +379,169 @@ class QRDecisionEngine:
 
         # ---------- UPI FLOW ----------
         if payload_type == PayloadType.UPI:
-            try:
-                upi_data = self.upi_parser.parse(payload)
-                risk = self.risk_engine.evaluate_upi(upi_data)
-
-                response["risk_level"] = risk.level().value
-                response["reasons"] = list(risk.reasons)
-                response["details"] = upi_data
-
-                timeline.add_step(
-                    stage="RISK_ANALYSIS",
-                    description="Heuristic UPI risk analysis completed",
-                    outcome=f"Risk level: {response['risk_level']}"
-                )
+            self._evaluate_upi(context["upi_data"], response, context["timeline"])
+
+        # ---------- URL FLOW ----------
+        elif payload_type == PayloadType.URL:
+            self._evaluate_url(context["payload"], response, context["timeline"])
 
-                if risk.level() == RiskLevel.HIGH:
-                    response["decision"] = DecisionAction.BLOCK
+        # ---------- UNKNOWN ----------
+        else:
+            self._evaluate_unknown(response, context["timeline"])
 
-                elif risk.level() == RiskLevel.MEDIUM:
-                    response["decision"] = DecisionAction.WARN
+        return {"risk_response": response}
 
-            except UPIParseError as e:
-                timeline.add_step(
-                    stage="PARSE",
-                    description="UPI parsing failed",
-                    outcome=str(e)
-                )
-                return self._block_decision(
-                    "Invalid or unsafe UPI QR",
-                    str(e),
-                    timeline
-                )
+    def _stage_ml_scoring(self, context: dict) -> dict:
+        features = self.feature_extractor.extract_upi_features(context["upi_data"])
+        ml_risk = self.ml_scorer.predict_risk(features)
 
-        # ---------- URL FLOW ----------
-        elif payload_type == PayloadType.URL:
-            risk = self.risk_engine.evaluate_url(payload)
+        context["timeline"].add_step(
+            stage="ML_SCORING",
+            description="ML scam probability computed",
+            outcome=f"Probability: {ml_risk['risk_probability']}"
+        )
 
-            response["risk_level"] = risk.level().value
-            response["reasons"] = list(risk.reasons)
-            response["details"] = {"url": payload}
+        return {"ml_risk": ml_risk, "upi_features": features}
 
-            timeline.add_step(
-                stage="RISK_ANALYSIS",
-                description="URL risk analysis completed",
-                outcome=f"Risk level: {response['risk_level']}"
-            )
+    def _stage_verdict(self, context: dict) -> dict:
+        response = dict(context["risk_response"])
+        response["reasons"] = list(response["reasons"])
+
+        probability = context.get("ml_risk", {}).get("risk_probability")
+        if probability is None:
+            return {"response": response}
 
-            if risk.level() != RiskLevel.LOW:
+        response["details"] = dict(response["details"], ml_risk_probability=probability)
+
+        # ML adds signal and can raise ALLOW to WARN, but never blocks on its own
+        if probability >= self.ML_HIGH_RISK:
+            response["reasons"].append("ML model identified high scam probability")
+            if response["decision"] == DecisionAction.ALLOW:
                 response["decision"] = DecisionAction.WARN
+                response["risk_level"] = RiskLevel.MEDIUM.value
 
-        # ---------- UNKNOWN ----------
-        else:
-            response["decision"] = DecisionAction.WARN
-            response["risk_level"] = RiskLevel.MEDIUM.value
-            response["reasons"].append("Unknown or unsupported QR payload")
+        elif probability >= self.ML_MODERATE_RISK:
+            response["reasons"].append("ML model identified moderate scam probability")
 
-            timeline.add_step(
-                stage="RISK_ANALYSIS",
-                description="Unknown QR payload pattern detected",
-                outcome="Risk level: MEDIUM"
-            )
+        return {"response": response}
 
-        # ---------- SCAM CATEGORY ----------
+    def _stage_scam_classification(self, context: dict) -> dict:
+        # Failed decodes/parses are not attributed to a scam category
+        if context.get("error"):
+            return {}
+
+        response = context["response"]
         scam_category = self.scam_classifier.classify(
             payload_type=response.get("payload_type"),
             reasons=response.get("reasons", []),
             details=response.get("details", {})
         )
-        response["scam_category"] = scam_category.value
 
-        timeline.add_step(
+        context["timeline"].add_step(
             stage="SCAM_CLASSIFICATION",
             description="Scam category determined",
             outcome=scam_category.value
         )
 
+        return {"scam_category": scam_category.value}
+
+    def _stage_ml_explain(self, context: dict) -> dict:
+        # SHAP is comparatively expensive and only useful to justify a warning
+        if context["response"]["decision"] == DecisionAction.ALLOW:
+            return {}
+
+        contributions = self.ml_xai.explain(context["upi_features"])
+        feature, value = max(contributions.items(), key=lambda item: item[1])
+
+        if value <= 0:
+            return {}
+
+        return {"ml_reasons": [f"ML analysis found '{feature}' as a major risk contributor"]}
+
+    def _stage_explain(self, context: dict) -> dict:
+        response = dict(context["response"])
+        timeline = context["timeline"]
+
+        if "scam_category" in context:
+            response["scam_category"] = context["scam_category"]
+
+        if context.get("ml_reasons"):
+            response["reasons"] = response["reasons"] + context["ml_reasons"]
+
+        # Blocked decodes/parses already recorded their DECISION step
+        if not context.get("error"):
+            timeline.add_step(
+                stage="DECISION",
+                description="Final decision applied",
+                outcome=response["decision"]
+            )
+            response["decision_timeline"] = timeline.export()
+
+        return {"final_result": self.explain_engine.generate(response)}
+
+    # ---------- HELPERS ----------
+
+    def _evaluate_upi(self, upi_data: dict, response: dict, timeline: DecisionTimeline):
+        risk = self.risk_engine.evaluate_upi(upi_data)
+
+        response["risk_level"] = risk.level().value
+        response["reasons"] = list(risk.reasons)
+        response["details"] = upi_data
+
+        timeline.add_step(
+            stage="RISK_ANALYSIS",
+            description="Heuristic UPI risk analysis completed",
+            outcome=f"Risk level: {response['risk_level']}"
+        )
+
+        if risk.level() == RiskLevel.HIGH:
+            response["decision"] = DecisionAction.BLOCK
+
+        elif risk.level() == RiskLevel.MEDIUM:
+            response["decision"] = DecisionAction.WARN
+
+    def _evaluate_url(self, url: str, response: dict, timeline: DecisionTimeline):
+        risk = self.risk_engine.evaluate_url(url)
+
+        response["risk_level"] = risk.level().value
+        response["reasons"] = list(risk.reasons)
+        response["details"] = {"url": url}
+
+        timeline.add_step(
+            stage="RISK_ANALYSIS",
+            description="URL risk analysis completed",
+            outcome=f"Risk level: {response['risk_level']}"
+        )
+
+        if risk.level() != RiskLevel.LOW:
+            response["decision"] = DecisionAction.WARN
+
+    def _evaluate_unknown(self, response: dict, timeline: DecisionTimeline):
+        response["decision"] = DecisionAction.WARN
+        response["risk_level"] = RiskLevel.MEDIUM.value
+        response["reasons"].append("Unknown or unsupported QR payload")
+
         timeline.add_step(
-            stage="DECISION",
-            description="Final decision applied",
-            outcome=response["decision"]
+            stage="RISK_ANALYSIS",
+            description="Unknown QR payload pattern detected",
+            outcome="Risk level: MEDIUM"
         )
 
-        response["decision_timeline"] = timeline.export()
+    def _ml_enabled(self) -> bool:
+        return self.enable_ml and self.ml_scorer.is_model_loaded()
 
-        final_result = self.explain_engine.generate(response)
-        self.audit_logger.log(final_result)
-        return final_result
+    def _build_ml_xai(self):
+        if not self.ml_scorer.is_model_loaded():
+            return None
+
+        try:
+            return MLExplainabilityEngine(
+                self.ml_scorer.model,
+                feature_names=self.ml_scorer.feature_names
+            )
+        except RuntimeError:
+            # SHAP is an optional dependency
+            return None
 
     def _block_decision(self, title: str, reason: str, timeline: DecisionTimeline) -> dict:
         timeline.add_step(
@@ -174,6 +557,5 @@ class QRDecisionEngine:
             "decision_timeline": timeline.export()
         }
 
-        final_result = self.explain_engine.generate(base_response)
-        self.audit_logger.log(final_result)
-        return final_result
+        return {"response": base_response, "error": title}
+
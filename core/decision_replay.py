@@ -0,0 +1,247 @@
+import argparse
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+from collections import Counter, defaultdict
+
+from core.decision_engine import QRDecisionEngine
+from core.decision_timeline import DecisionTimeline
+
+
+# Candidate engine, built once per worker process
+_replay_engine = None
+
+
+class DecisionReplayer:
+    """
+    Re-runs logged QR payloads through a candidate engine and reports verdict
+    and per-stage latency differences against the audit log
+    """
+
+    def __init__(
+        self,
+        engine_factory=QRDecisionEngine,
+        workers: int = None,
+        chunksize: int = 256,
+        max_diffs: int = 1000
+    ):
+        """
+        Args:
+            engine_factory: Picklable callable returning the candidate engine
+            workers (int): Number of replay processes (1 replays in-process)
+            chunksize (int): Payloads handed to a worker per task
+            max_diffs (int): Maximum number of individual diffs kept in the report
+        """
+        self.engine_factory = engine_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.max_diffs = max_diffs
+
+    # ---------- PUBLIC API ----------
+
+    def replay(self, log_file: str) -> dict:
+        """
+        Replays every audit record that carries a payload
+
+        Args:
+            log_file (str): Audit log written with include_payload=True
+
+        Returns:
+            dict: Replay report
+        """
+        report = {
+            "records": 0,
+            "replayed": 0,
+            "skipped_no_payload": 0,
+            "malformed": 0,
+            "verdict_changes": 0,
+            "transitions": Counter(),
+            "baseline_versions": Counter(),
+            "diffs": [],
+        }
+        # stage -> [total_ms, samples]
+        baseline_ms = defaultdict(lambda: [0.0, 0])
+        candidate_ms = defaultdict(lambda: [0.0, 0])
+
+        records = self._read_records(log_file, report)
+
+        # Replay in bounded batches so memory stays flat for very large logs
+        batch_size = self.workers * self.chunksize * 4
+
+        with self._executor() as map_fn:
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    break
+
+                payloads = [record["payload"] for _, record in batch]
+                outcomes = map_fn(_replay_payload, payloads)
+
+                for (line_no, record), outcome in zip(batch, outcomes):
+                    self._compare(line_no, record, outcome, report)
+                    _collect_stage_ms(record.get("decision_timeline"), baseline_ms)
+                    _collect_stage_ms(outcome["timeline"], candidate_ms)
+
+        report["stage_latency_ms"] = _summarize_latency(baseline_ms, candidate_ms)
+        report["transitions"] = dict(report["transitions"])
+        report["baseline_versions"] = dict(report["baseline_versions"])
+        return report
+
+    # ---------- INTERNAL HELPERS ----------
+
+    def _read_records(self, log_file: str, report: dict):
+        # A crash mid-write leaves a truncated last line (possibly cut inside
+        # a multi-byte character); such lines are counted, not fatal
+        with open(log_file, encoding="utf-8", errors="replace") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+
+                if not isinstance(record, dict):
+                    report["malformed"] += 1
+                    continue
+
+                report["records"] += 1
+
+                if "payload" not in record:
+                    report["skipped_no_payload"] += 1
+                    continue
+
+                yield line_no, record
+
+    def _compare(self, line_no: int, record: dict, outcome: dict, report: dict):
+        report["replayed"] += 1
+
+        version = "{}/{}".format(record.get("rules_version"), record.get("model_version"))
+        report["baseline_versions"][version] += 1
+
+        baseline = (record.get("decision"), record.get("risk_level"))
+        candidate = (outcome["decision"], outcome["risk_level"])
+
+        if baseline == candidate:
+            return
+
+        report["verdict_changes"] += 1
+        report["transitions"][f"{baseline[0]}->{candidate[0]}"] += 1
+
+        if len(report["diffs"]) < self.max_diffs:
+            report["diffs"].append({
+                "line": line_no,
+                "payload_sha256": record.get("payload_sha256"),
+                "baseline": {"decision": baseline[0], "risk_level": baseline[1]},
+                "candidate": {"decision": candidate[0], "risk_level": candidate[1]},
+            })
+
+    def _executor(self):
+        if self.workers == 1:
+            return _InlineExecutor(self.engine_factory)
+        return _PoolExecutor(self.engine_factory, self.workers, self.chunksize)
+
+
+class _InlineExecutor:
+    def __init__(self, engine_factory):
+        self.engine_factory = engine_factory
+
+    def __enter__(self):
+        _init_replay_worker(self.engine_factory)
+        return lambda fn, items: [fn(item) for item in items]
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _PoolExecutor:
+    def __init__(self, engine_factory, workers: int, chunksize: int):
+        self.engine_factory = engine_factory
+        self.workers = workers
+        self.chunksize = chunksize
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = multiprocessing.Pool(
+            processes=self.workers,
+            initializer=_init_replay_worker,
+            initargs=(self.engine_factory,)
+        )
+        return lambda fn, items: self._pool.map(fn, items, chunksize=self.chunksize)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool.close()
+        self._pool.join()
+        return False
+
+
+# ---------- WORKER SIDE ----------
+
+def _init_replay_worker(engine_factory):
+    global _replay_engine
+    _replay_engine = engine_factory()
+
+
+def _replay_payload(payload: str) -> dict:
+    timeline = DecisionTimeline()
+    result = _replay_engine.analyze_payload(payload, timeline)
+
+    return {
+        "decision": result.get("decision"),
+        "risk_level": result.get("risk_level"),
+        "timeline": timeline.export(),
+    }
+
+
+def _collect_stage_ms(timeline: list, samples: dict):
+    for step in timeline or []:
+        if "elapsed_ms" in step:
+            totals = samples[step["stage"]]
+            totals[0] += step["elapsed_ms"]
+            totals[1] += 1
+
+
+def _summarize_latency(baseline_ms: dict, candidate_ms: dict) -> dict:
+    summary = {}
+
+    for stage in sorted(set(baseline_ms) & set(candidate_ms)):
+        baseline_mean = baseline_ms[stage][0] / baseline_ms[stage][1]
+        candidate_mean = candidate_ms[stage][0] / candidate_ms[stage][1]
+
+        summary[stage] = {
+            "baseline_mean": round(baseline_mean, 3),
+            "candidate_mean": round(candidate_mean, 3),
+            "delta": round(candidate_mean - baseline_mean, 3),
+        }
+
+    return summary
+
+
+def _load_factory(spec: str):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay audit-logged QR payloads against a candidate engine")
+    parser.add_argument("log_file", help="Audit log written with include_payload=True")
+    parser.add_argument("--engine", default="core.decision_engine:QRDecisionEngine",
+                        help="Candidate engine factory as module:callable")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-diffs", type=int, default=1000)
+    args = parser.parse_args()
+
+    replayer = DecisionReplayer(
+        engine_factory=_load_factory(args.engine),
+        workers=args.workers,
+        max_diffs=args.max_diffs
+    )
+    print(json.dumps(replayer.replay(args.log_file), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import threading
+import time
 from datetime import datetime
 
 
@@ -8,14 +10,62 @@ class DecisionTimeline:
 
     def __init__(self):
         self.steps = []
+        self._last_tick = time.perf_counter()
+
+        # Pipeline stages may add steps from several threads at once
+        self._lock = threading.Lock()
+        self._stage = threading.local()
+        self._order = []
+        self._last_stage_order = -1
+
+    def start_stage(self, order: int):
+        """
+        Marks the start of a pipeline stage on the calling thread.
+
+        Steps added by the stage are timed from this point rather than from
+        whatever step another thread recorded last, and are exported in
+        stage order regardless of which parallel stage finished first.
+
+        Args:
+            order (int): Position of the stage in the pipeline
+        """
+        self._stage.order = order
+        self._stage.tick = time.perf_counter()
 
     def add_step(self, stage: str, description: str, outcome: str = None):
-        self.steps.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "stage": stage,
-            "description": description,
-            "outcome": outcome
-        })
+        now = time.perf_counter()
+        stage_order = getattr(self._stage, "order", None)
+
+        with self._lock:
+            # Time spent since the previous step of the same stage (or since
+            # the stage started), i.e. the cost of this step
+            if stage_order is None:
+                elapsed_ms = (now - self._last_tick) * 1000
+                stage_order = self._last_stage_order
+            else:
+                elapsed_ms = (now - self._stage.tick) * 1000
+                self._stage.tick = now
+                self._last_stage_order = max(self._last_stage_order, stage_order)
+
+            self._last_tick = now
+
+            step = {
+                "timestamp": datetime.utcnow().isoformat(),
+                "stage": stage,
+                "description": description,
+                "outcome": outcome,
+                "elapsed_ms": round(elapsed_ms, 3)
+            }
+
+            # Export in stage order, and in insertion order within a stage
+            key = (stage_order, len(self._order))
+            position = len(self._order)
+            while position > 0 and self._order[position - 1] > key:
+                position -= 1
+
+            self._order.insert(position, key)
+            self.steps.insert(position, step)
 
     def export(self) -> list:
-        return self.steps
+        with self._lock:
+            return list(self.steps)
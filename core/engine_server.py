@@ -0,0 +1,204 @@
+import gc
+import hashlib
+import multiprocessing
+import os
+import resource
+
+from core.decision_engine import QRDecisionEngine
+
+
+# Populated in the parent before workers are forked, so every worker
+# inherits the same engine pages copy-on-write instead of loading its own.
+_shared_engine = None
+_shared_cache = None
+
+
+class SharedVerdictCache:
+    """
+    Bounded verdict cache shared by all worker processes
+    """
+
+    def __init__(self, manager, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = manager.dict()
+        self._order = manager.list()
+        self._lock = manager.Lock()
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def put(self, key: str, verdict):
+        with self._lock:
+            if key in self._entries:
+                return
+
+            # Evict oldest entries first (FIFO)
+            while len(self._order) >= self.max_entries:
+                self._entries.pop(self._order.pop(0), None)
+
+            self._entries[key] = verdict
+            self._order.append(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QREngineServer:
+    """
+    Runs QR analysis in forked worker processes that share one preloaded engine
+    """
+
+    def __init__(
+        self,
+        engine_factory=QRDecisionEngine,
+        workers: int = None,
+        cache_size: int = 10000
+    ):
+        """
+        Args:
+            engine_factory: Callable returning the engine, called once in the
+                parent before forking (e.g. a functools.partial of
+                QRDecisionEngine with an audit logger, enable_ml or an
+                MLRiskScorer(mmap_mode="r"))
+            workers (int): Number of worker processes
+            cache_size (int): Maximum number of cached verdicts
+        """
+        self.engine_factory = engine_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+
+        self._manager = None
+        self._pool = None
+        self.cache = None
+        self.worker_rss = {}
+        self._froze_gc = False
+
+    # ---------- LIFECYCLE ----------
+
+    def start(self):
+        """
+        Loads the engine once in the parent and forks the worker pool
+        """
+        global _shared_engine, _shared_cache
+
+        if self._pool is not None:
+            return
+
+        ctx = multiprocessing.get_context("fork")
+
+        # Start the cache manager before loading the model so its
+        # server process does not carry a copy of the engine.
+        self._manager = ctx.Manager()
+        self.cache = SharedVerdictCache(self._manager, self.cache_size)
+
+        _shared_engine = self.engine_factory()
+        _shared_cache = self.cache
+
+        # Move everything allocated so far out of the GC's generations so
+        # collections in the workers do not touch (and copy) shared pages.
+        # Only unfreeze on stop if nothing else had frozen objects already.
+        gc.collect()
+        self._froze_gc = gc.get_freeze_count() == 0
+        gc.freeze()
+
+        self._pool = ctx.Pool(processes=self.workers)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+        if self._froze_gc:
+            gc.unfreeze()
+            self._froze_gc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ---------- PUBLIC API ----------
+
+    def analyze_qr(self, image_path: str) -> dict:
+        """
+        Analyzes a single QR image in a worker process
+        """
+        return self.analyze_many([image_path])[0]
+
+    def analyze_many(self, image_paths: list) -> list:
+        """
+        Analyzes QR images across the worker pool, preserving input order
+        """
+        if self._pool is None:
+            raise RuntimeError("QREngineServer is not started")
+
+        results = []
+        for result, pid, rss in self._pool.map(_analyze_in_worker, image_paths):
+            self.worker_rss[pid] = rss
+            results.append(result)
+
+        return results
+
+    def memory_report(self) -> dict:
+        """
+        Returns the parent RSS and the last reported RSS of each worker, in bytes
+        """
+        return {
+            "parent_pid": os.getpid(),
+            "parent_rss": _current_rss(),
+            "workers": dict(self.worker_rss),
+        }
+
+
+# ---------- WORKER SIDE ----------
+
+def _analyze_in_worker(image_path: str):
+    cache_key = _image_digest(image_path)
+
+    if cache_key is not None:
+        cached = _shared_cache.get(cache_key)
+        if cached is not None:
+            # Cache hits are still scans and must stay traceable and
+            # replayable, so they are audited with their payload
+            result, payload = cached
+            _shared_engine.audit(result, payload)
+            return result, os.getpid(), _current_rss()
+
+    result, payload = _shared_engine.scan_qr(image_path)
+
+    if cache_key is not None:
+        _shared_cache.put(cache_key, (result, payload))
+
+    return result, os.getpid(), _current_rss()
+
+
+def _image_digest(image_path: str):
+    digest = hashlib.sha256()
+    try:
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def _current_rss() -> int:
+    """
+    Resident set size of the calling process in bytes
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the best portable fallback (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
@@ -45,6 +45,9 @@ class QRExplainabilityEngine:
             "Unknown or unsupported QR payload":
                 "The QR uses an unusual format that cannot be safely verified.",
 
+            "Service under heavy load":
+                "The QR could not be fully verified because the security service is under heavy load. Try scanning again shortly.",
+
             "ML model identified high scam probability":
                 "Machine learning analysis indicates a high likelihood that this QR code is part of a scam.",
 
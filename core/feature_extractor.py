@@ -1,60 +1,119 @@
 from urllib.parse import urlparse
 import re
 
+import numpy as np
+
 
 class QRFeatureExtractor:
     """
     Extracts ML-ready numerical features from QR payload data
     """
 
+    GENERIC_NAMES = frozenset({"payment", "upi", "pay", "merchant", "store"})
+
+    SHORTENERS = frozenset({
+        "bit.ly", "tinyurl.com", "t.co",
+        "goo.gl", "ow.ly", "is.gd"
+    })
+
+    IP_PATTERN = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+    # Column order of the UPI feature matrix. Must match the training
+    # columns in model/train_model.py (the model's feature_names_in_).
+    UPI_FEATURE_SCHEMA = (
+        "amount",
+        "merchant_name_missing",
+        "merchant_name_length",
+        "upi_id_length",
+        "generic_merchant_name",
+    )
+
+    # Column order of the URL feature matrix
+    URL_FEATURE_SCHEMA = (
+        "has_shortener",
+        "is_https",
+        "is_ip_url",
+        "url_length",
+    )
+
     # ---------- PUBLIC API ----------
 
     def extract_upi_features(self, upi_data: dict) -> dict:
         """
         Extracts features from parsed UPI payload
         """
-        features = {}
+        return dict(zip(self.UPI_FEATURE_SCHEMA, self._upi_row(upi_data)))
 
-        payee_name = upi_data.get("payee_name", "")
-        payee_address = upi_data.get("payee_address", "")
-        amount = upi_data.get("amount") or 0
+    def extract_url_features(self, url: str) -> dict:
+        """
+        Extracts features from URL-based QR payloads
+        """
+        return dict(zip(self.URL_FEATURE_SCHEMA, self._url_row(url)))
 
-        features["amount"] = float(amount)
-        features["merchant_name_missing"] = 1 if not payee_name else 0
-        features["merchant_name_length"] = len(payee_name)
-        features["upi_id_length"] = len(payee_address)
-        features["generic_merchant_name"] = self._is_generic_name(payee_name)
+    def extract_upi_feature_matrix(self, upi_records) -> np.ndarray:
+        """
+        Extracts features from many parsed UPI payloads at once
 
-        return features
+        Args:
+            upi_records: Sequence of parsed UPI payload dicts
 
-    def extract_url_features(self, url: str) -> dict:
+        Returns:
+            np.ndarray: float64 matrix of shape (n, len(UPI_FEATURE_SCHEMA))
         """
-        Extracts features from URL-based QR payloads
+        rows = [self._upi_row(upi_data) for upi_data in upi_records]
+        return self._to_matrix(rows, len(self.UPI_FEATURE_SCHEMA))
+
+    def extract_url_feature_matrix(self, urls) -> np.ndarray:
         """
-        features = {}
+        Extracts features from many URL payloads at once
+
+        Args:
+            urls: Sequence of URL strings
+
+        Returns:
+            np.ndarray: float64 matrix of shape (n, len(URL_FEATURE_SCHEMA))
+        """
+        rows = [self._url_row(url) for url in urls]
+        return self._to_matrix(rows, len(self.URL_FEATURE_SCHEMA))
+
+    # ---------- INTERNAL HELPERS ----------
 
+    def _upi_row(self, upi_data: dict) -> tuple:
+        payee_name = upi_data.get("payee_name", "")
+        payee_address = upi_data.get("payee_address", "")
+        amount = upi_data.get("amount") or 0
+
+        # Keep in UPI_FEATURE_SCHEMA order
+        return (
+            float(amount),
+            1 if not payee_name else 0,
+            len(payee_name),
+            len(payee_address),
+            self._is_generic_name(payee_name),
+        )
+
+    def _url_row(self, url: str) -> tuple:
         parsed = urlparse(url)
         domain = parsed.netloc.lower()
 
-        features["url_length"] = len(url)
-        features["has_shortener"] = self._is_shortened_url(domain)
-        features["is_https"] = 1 if parsed.scheme == "https" else 0
-        features["is_ip_url"] = self._is_ip_based(domain)
-
-        return features
+        # Keep in URL_FEATURE_SCHEMA order
+        return (
+            self._is_shortened_url(domain),
+            1 if parsed.scheme == "https" else 0,
+            self._is_ip_based(domain),
+            len(url),
+        )
 
-    # ---------- INTERNAL HELPERS ----------
+    def _to_matrix(self, rows: list, width: int) -> np.ndarray:
+        if not rows:
+            return np.empty((0, width), dtype=np.float64)
+        return np.array(rows, dtype=np.float64)
 
     def _is_generic_name(self, name: str) -> int:
-        generic_names = ["payment", "upi", "pay", "merchant", "store"]
-        return 1 if name.lower().strip() in generic_names else 0
+        return 1 if name.lower().strip() in self.GENERIC_NAMES else 0
 
     def _is_shortened_url(self, domain: str) -> int:
-        shorteners = [
-            "bit.ly", "tinyurl.com", "t.co",
-            "goo.gl", "ow.ly", "is.gd"
-        ]
-        return 1 if domain in shorteners else 0
+        return 1 if domain in self.SHORTENERS else 0
 
     def _is_ip_based(self, domain: str) -> int:
-        return 1 if re.match(r"^\d{1,3}(\.\d{1,3}){3}$", domain) else 0
+        return 1 if self.IP_PATTERN.match(domain) else 0
@@ -1,22 +1,50 @@
+import hashlib
 import joblib
+import numpy as np
 import os
 
+from core.feature_extractor import QRFeatureExtractor
+
 
 class MLRiskScorer:
     """
     Loads a trained ML model and performs risk inference
     """
 
-    def __init__(self, model_path: str = "model/qr_risk_model.pkl"):
+    def __init__(self, model_path: str = "model/qr_risk_model.pkl", mmap_mode: str = None):
+        """
+        Args:
+            model_path (str): Path to the joblib-serialized model
+            mmap_mode (str): Optional joblib mmap mode (e.g. "r") so model
+                arrays are backed by the page cache and shared between processes
+        """
         self.model = None
         self.model_path = model_path
+        self.model_version = None
+        self.feature_names = list(QRFeatureExtractor.UPI_FEATURE_SCHEMA)
 
         if os.path.exists(model_path):
-            self.model = joblib.load(model_path)
+            self.model = joblib.load(model_path, mmap_mode=mmap_mode)
+            self.model_version = self._file_digest(model_path)
+
+            # Column order the model was trained with; scoring in any
+            # other order silently feeds features into the wrong columns
+            if hasattr(self.model, "feature_names_in_"):
+                self.feature_names = list(self.model.feature_names_in_)
 
     def is_model_loaded(self) -> bool:
         return self.model is not None
 
+    def _file_digest(self, path: str) -> str:
+        """
+        Short content hash of the model file, used as its version
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()[:12]
+
     def predict_risk(self, features: dict) -> dict:
         """
         Predicts scam probability using ML model
@@ -34,8 +62,8 @@ class MLRiskScorer:
                 "model_used": False
             }
 
-        # Keep feature order consistent
-        feature_values = [features[key] for key in sorted(features.keys())]
+        # Same column order as training
+        feature_values = [features[key] for key in self.feature_names]
 
         probability = self.model.predict_proba([feature_values])[0][1]
 
@@ -43,3 +71,46 @@ class MLRiskScorer:
             "risk_probability": round(float(probability), 3),
             "model_used": True
         }
+
+    def predict_risk_batch(self, feature_matrix) -> dict:
+        """
+        Predicts scam probabilities for many payloads in one model call
+
+        Args:
+            feature_matrix (np.ndarray): Rows from
+                QRFeatureExtractor.extract_upi_feature_matrix, columns in
+                feature_names order
+
+        Returns:
+            dict: risk_probability array (one per row) and model_used flag
+
+        Raises:
+            ValueError: If the matrix width does not match the model's features
+        """
+
+        if not self.model:
+            return {
+                "risk_probability": None,
+                "model_used": False
+            }
+
+        feature_matrix = np.asarray(feature_matrix, dtype=np.float64)
+
+        if feature_matrix.ndim != 2 or feature_matrix.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Feature matrix has shape {feature_matrix.shape}, expected "
+                f"(n, {len(self.feature_names)}) with columns {self.feature_names}"
+            )
+
+        if len(feature_matrix) == 0:
+            return {
+                "risk_probability": np.empty(0, dtype=np.float64),
+                "model_used": True
+            }
+
+        probabilities = self.model.predict_proba(feature_matrix)[:, 1]
+
+        return {
+            "risk_probability": probabilities.round(3),
+            "model_used": True
+        }
@@ -0,0 +1,174 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PipelineStage:
+    """
+    A named unit of work that reads from and writes to a shared scan context
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func,
+        inputs: tuple = (),
+        outputs: tuple = (),
+        optional_inputs: tuple = (),
+        always_run: bool = False,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            name (str): Stage name, used for timings and enable/disable
+            func: Callable taking the context dict and returning a dict of outputs
+            inputs (tuple): Context keys that must be present for the stage to run
+            outputs (tuple): Context keys the stage may produce
+            optional_inputs (tuple): Context keys waited for if another stage
+                can still produce them, but not required
+            always_run (bool): Keep running after the pipeline has been halted
+            enabled (bool): Disabled stages are never run
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.optional_inputs = tuple(optional_inputs)
+        self.always_run = always_run
+        self.enabled = enabled
+
+
+class StagePipeline:
+    """
+    Runs stages in dependency order, independent stages in parallel
+    """
+
+    def __init__(self, stages: list, halt_when=None, max_workers: int = 4, on_stage_start=None):
+        """
+        Args:
+            stages (list): PipelineStage objects
+            halt_when: Callable on the context; once it returns True only
+                always_run stages are still scheduled
+            max_workers (int): Thread pool size for independent stages
+            on_stage_start: Optional callable (stage, context) invoked on the
+                stage's own thread right before the stage runs
+        """
+        names = [stage.name for stage in stages]
+        if len(names) != len(set(names)):
+            raise ValueError("Pipeline stage names must be unique")
+
+        self.stages = list(stages)
+        self.halt_when = halt_when
+        self.max_workers = max_workers
+        self.on_stage_start = on_stage_start
+
+        self._executor = None
+        self._executor_pid = None
+
+    def stage_names(self) -> list:
+        return [stage.name for stage in self.stages]
+
+    def run(self, context: dict, skip: tuple = (), parallel: bool = True) -> dict:
+        """
+        Runs the pipeline, updating context in place
+
+        Args:
+            context (dict): Initial inputs; stage outputs are merged into it
+            skip (tuple): Stage names to leave out of this run only
+            parallel (bool): Run independent stages on the thread pool;
+                False keeps every stage on the calling thread
+
+        Returns:
+            dict: Wall-clock milliseconds per stage that ran
+        """
+        pending = [
+            stage for stage in self.stages
+            if stage.enabled and stage.name not in skip
+        ]
+        timings = {}
+        halted = False
+
+        while pending:
+            live = self._live_stages(pending, context, halted)
+            ready = [stage for stage in live if self._is_ready(stage, live, context)]
+
+            if not ready:
+                if live:
+                    raise RuntimeError(
+                        "Pipeline stages depend on each other: "
+                        + ", ".join(stage.name for stage in live)
+                    )
+                break
+
+            pending = [stage for stage in live if stage not in ready]
+
+            for stage, outputs, elapsed_ms in self._run_wave(ready, context, parallel):
+                timings[stage.name] = round(elapsed_ms, 3)
+                context.update(outputs or {})
+
+            if not halted and self.halt_when is not None and self.halt_when(context):
+                halted = True
+
+        return timings
+
+    # ---------- INTERNAL HELPERS ----------
+
+    def _live_stages(self, pending: list, context: dict, halted: bool) -> list:
+        """
+        Drops stages that can no longer run: halted away, or waiting on an
+        input that is missing and that no remaining stage can produce
+        """
+        live = [stage for stage in pending if stage.always_run or not halted]
+
+        while True:
+            runnable = [
+                stage for stage in live
+                if all(
+                    key in context or self._produced_by_other(key, stage, live)
+                    for key in stage.inputs
+                )
+            ]
+            if len(runnable) == len(live):
+                return live
+            live = runnable
+
+    def _is_ready(self, stage: PipelineStage, live: list, context: dict) -> bool:
+        if not all(key in context for key in stage.inputs):
+            return False
+
+        return not any(
+            self._produced_by_other(key, stage, live)
+            for key in stage.inputs + stage.optional_inputs
+        )
+
+    def _produced_by_other(self, key: str, stage: PipelineStage, live: list) -> bool:
+        return any(other is not stage and key in other.outputs for other in live)
+
+    def _run_wave(self, ready: list, context: dict, parallel: bool) -> list:
+        if not parallel or len(ready) == 1 or self.max_workers <= 1:
+            return [self._run_stage(stage, context) for stage in ready]
+
+        futures = [
+            self._get_executor().submit(self._run_stage, stage, context)
+            for stage in ready
+        ]
+        return [future.result() for future in futures]
+
+    def _run_stage(self, stage: PipelineStage, context: dict) -> tuple:
+        if self.on_stage_start is not None:
+            self.on_stage_start(stage, context)
+
+        start = time.perf_counter()
+        outputs = stage.func(context)
+        return stage, outputs, (time.perf_counter() - start) * 1000
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Worker threads do not survive fork, so a forked child
+        # (see QREngineServer) starts its own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="qr-stage"
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
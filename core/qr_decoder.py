@@ -1,4 +1,9 @@
+import math
+import threading
+import time
+from collections import Counter, deque
 import cv2
+import numpy as np
 from pyzbar.pyzbar import decode
 from PIL import Image
 import os
@@ -10,15 +15,64 @@ class QRDecodeError(Exception):
 
 
 class QRDecoder:
-    def __init__(self):
-        pass
+    # Cheaper pixel budgets tried before the configured one. QR codes in
+    # phone photos are usually large enough to decode at well under 1 MP.
+    PROGRESSIVE_BUDGETS = (500_000, 2_000_000)
 
-    def decode_qr(self, image_path: str) -> str:
+    # Recovery steps for blurred, low-contrast, skewed or inverted codes,
+    # tried only after the plain pyzbar scan finds nothing
+    DEFAULT_FALLBACK_STEPS = (
+        "opencv", "adaptive_threshold", "sharpen", "invert", "rotate"
+    )
+
+    ROTATION_ANGLES = (15, -15, 30, -30, 45)
+    SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+
+    def __init__(
+        self,
+        pixel_budget: int = 8_000_000,
+        max_image_pixels: int = 64_000_000,
+        progressive: bool = True,
+        fallback_steps: tuple = DEFAULT_FALLBACK_STEPS,
+        fallback_time_budget: float = 0.25,
+        stats_window: int = 256
+    ):
+        """
+        Args:
+            pixel_budget (int): Maximum pixels handed to the QR scanner;
+                larger images are downscaled to fit
+            max_image_pixels (int): Images declaring more pixels than this are
+                rejected before decompression (decompression-bomb guard)
+            progressive (bool): Try low resolutions first and escalate
+                only when no QR code is found
+            fallback_steps (tuple): Recovery steps to try when the plain scan
+                fails; an empty tuple disables the fallback chain
+            fallback_time_budget (float): Seconds after which no further
+                fallback step is started
+            stats_window (int): Number of recent fallback successes used to
+                decide which step to try first
+        """
+        self.pixel_budget = pixel_budget
+        self.max_image_pixels = max_image_pixels
+        self.progressive = progressive
+        self.fallback_steps = tuple(fallback_steps)
+        self.fallback_time_budget = fallback_time_budget
+
+        unknown = set(self.fallback_steps) - set(self.DEFAULT_FALLBACK_STEPS)
+        if unknown:
+            raise ValueError(f"Unknown fallback steps: {sorted(unknown)}")
+
+        # Shared by concurrent scans, so only touched under the lock
+        self._recent_successes = deque(maxlen=stats_window)
+        self._stats_lock = threading.Lock()
+
+    def decode_qr(self, image_path: str, pixel_budget: int = None) -> str:
         """
         Decodes a QR code from an image file.
 
         Args:
             image_path (str): Path to QR image
+            pixel_budget (int): Overrides the configured pixel budget for this call
 
         Returns:
             str: Decoded QR payload
@@ -31,14 +85,17 @@ class QRDecoder:
             raise QRDecodeError("Image file does not exist")
 
         try:
-            image = Image.open(image_path)
-            decoded_objects = decode(image)
+            qr_data = None
+            for image in self._frames(image_path, pixel_budget or self.pixel_budget):
+                qr_data = self._scan(image)
+                if qr_data is not None:
+                    break
 
-            if not decoded_objects:
-                raise QRDecodeError("No QR code detected in image")
+            if qr_data is None and self.fallback_steps:
+                qr_data = self._run_fallbacks(np.asarray(image))
 
-            # Take first QR (payment apps also do this)
-            qr_data = decoded_objects[0].data.decode("utf-8").strip()
+            if qr_data is None:
+                raise QRDecodeError("No QR code detected in image")
 
             if not qr_data:
                 raise QRDecodeError("QR code payload is empty")
@@ -48,5 +105,190 @@ class QRDecoder:
         except QRDecodeError:
             raise
 
+        except Image.DecompressionBombError:
+            raise QRDecodeError("Image exceeds the maximum allowed size")
+
         except Exception as e:
             raise QRDecodeError(f"QR decoding failed: {str(e)}")
+
+    def fallback_stats(self) -> dict:
+        """
+        Recent fallback successes per step
+        """
+        with self._stats_lock:
+            return dict(Counter(self._recent_successes))
+
+    def _scan(self, image):
+        """
+        Runs pyzbar on an image or grayscale array
+
+        Returns:
+            str | None: Payload of the first QR found, or None
+        """
+        decoded_objects = decode(image)
+
+        if not decoded_objects:
+            return None
+
+        # Take first QR (payment apps also do this)
+        return decoded_objects[0].data.decode("utf-8").strip()
+
+    def _frames(self, image_path: str, budget: int):
+        """
+        Yields grayscale frames for successive scan passes, cheapest first
+        """
+
+        # Image.open only reads the header; pixels are decoded lazily
+        with Image.open(image_path) as image:
+            pixels = image.width * image.height
+
+            if pixels > self.max_image_pixels:
+                raise QRDecodeError("Image exceeds the maximum allowed size")
+
+            # JPEG can decode straight to a reduced DCT scale, so each pass
+            # decodes only the resolution it scans. Other formats are decoded
+            # once and the cheaper passes are reduced from that frame.
+            supports_draft = type(image).draft is not Image.Image.draft
+            if not supports_draft:
+                base = self._decode_frame(image, budget)
+
+        if supports_draft:
+            for pass_budget in self._pixel_budgets(min(pixels, budget)):
+                with Image.open(image_path) as image:
+                    frame = self._decode_frame(image, pass_budget)
+                yield frame
+        else:
+            for pass_budget in self._pixel_budgets(base.width * base.height):
+                yield self._fit_to_budget(base, pass_budget)
+
+    def _pixel_budgets(self, image_pixels: int) -> tuple:
+        """
+        Budgets for successive scan passes of a frame of image_pixels.
+
+        Cheaper budgets are only worth a pass while they actually shrink the
+        frame; the last pass always scans the frame at full size.
+        """
+        if not self.progressive:
+            return (image_pixels,)
+
+        cheaper = tuple(b for b in self.PROGRESSIVE_BUDGETS if b < image_pixels)
+        return cheaper + (image_pixels,)
+
+    def _fit_to_budget(self, image: Image.Image, budget: int) -> Image.Image:
+        """
+        Downscales an image to the largest size within the pixel budget
+        """
+        pixels = image.width * image.height
+        if pixels <= budget:
+            return image
+
+        scale = math.sqrt(pixels / budget)
+        size = (max(1, int(image.width / scale)), max(1, int(image.height / scale)))
+
+        # reduce() is a cheap box filter but only takes integer factors, so
+        # it does the bulk of the work and resize() lands on the exact size
+        factor = math.floor(scale)
+        if factor >= 2:
+            image = image.reduce(factor)
+
+        if image.size != size:
+            image = image.resize(size, Image.BILINEAR)
+
+        return image
+
+    def _decode_frame(self, image: Image.Image, budget: int) -> Image.Image:
+        """
+        Decodes the first frame of an opened image as grayscale, within a pixel budget
+        """
+        width, height = image.size
+        pixels = width * height
+
+        if pixels > budget:
+            # Only JPEG honours draft: it decodes at the smallest DCT scale
+            # that still covers the requested size, so the full-resolution
+            # bitmap is never materialised. No-op for other formats.
+            ratio = math.sqrt(budget / pixels)
+            image.draft("L", (max(1, int(width * ratio)), max(1, int(height * ratio))))
+
+        # Multi-page formats (TIFF, GIF) open on their first frame,
+        # which is the only one scanned.
+        image.load()
+
+        # Palette, bilevel and CMYK pixels cannot be averaged directly
+        if image.mode not in ("L", "RGB", "RGBA"):
+            image = image.convert("L")
+
+        # Downscale before converting so no full-size grayscale copy is made
+        return self._fit_to_budget(image, budget).convert("L")
+
+    # ---------- FALLBACK CHAIN ----------
+
+    def _run_fallbacks(self, gray: np.ndarray):
+        """
+        Tries recovery steps, most recently successful first, within the time budget
+        """
+        deadline = time.perf_counter() + self.fallback_time_budget
+
+        handlers = {
+            "opencv": self._fallback_opencv,
+            "adaptive_threshold": self._fallback_adaptive_threshold,
+            "sharpen": self._fallback_sharpen,
+            "invert": self._fallback_invert,
+            "rotate": lambda image: self._fallback_rotate(image, deadline),
+        }
+
+        for step in self._fallback_order():
+            if time.perf_counter() > deadline:
+                break
+
+            qr_data = handlers[step](gray)
+            if qr_data is not None:
+                with self._stats_lock:
+                    self._recent_successes.append(step)
+                return qr_data
+
+        return None
+
+    def _fallback_order(self) -> list:
+        # Stable sort keeps the configured order between equally successful steps
+        with self._stats_lock:
+            successes = Counter(self._recent_successes)
+        return sorted(self.fallback_steps, key=lambda step: -successes[step])
+
+    def _fallback_opencv(self, gray: np.ndarray):
+        qr_data, _, _ = cv2.QRCodeDetector().detectAndDecode(gray)
+        return qr_data.strip() if qr_data else None
+
+    def _fallback_adaptive_threshold(self, gray: np.ndarray):
+        binary = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+        )
+        return self._scan(binary)
+
+    def _fallback_sharpen(self, gray: np.ndarray):
+        return self._scan(cv2.filter2D(gray, -1, self.SHARPEN_KERNEL))
+
+    def _fallback_invert(self, gray: np.ndarray):
+        return self._scan(cv2.bitwise_not(gray))
+
+    def _fallback_rotate(self, gray: np.ndarray, deadline: float):
+        height, width = gray.shape
+        center = (width / 2, height / 2)
+
+        for angle in self.ROTATION_ANGLES:
+            if time.perf_counter() > deadline:
+                break
+
+            matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+            rotated = cv2.warpAffine(
+                gray, matrix, (width, height),
+                flags=cv2.INTER_LINEAR,
+                borderMode=cv2.BORDER_CONSTANT,
+                borderValue=255
+            )
+
+            qr_data = self._scan(rotated)
+            if qr_data is not None:
+                return qr_data
+
+        return None
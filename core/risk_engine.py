@@ -25,6 +25,10 @@ class RiskResult:
 
 
 class QRHeuristicRiskEngine:
+    # Bump whenever a rule, weight or threshold changes so audit
+    # records can be tied to the rule set that produced them
+    RULES_VERSION = "1.0"
+
     def evaluate_upi(self, upi_data: dict) -> RiskResult:
         """
         Applies heuristic rules to UPI payment data
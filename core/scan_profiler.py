@@ -0,0 +1,280 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import shutil
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+
+class ScanCapture:
+    """
+    Profiling state of a single in-flight scan
+    """
+
+    def __init__(self, sampled: bool, profile: cProfile.Profile = None, traced: bool = False):
+        self.sampled = sampled
+        self.profile = profile
+        self.traced = traced
+        self.started = time.perf_counter()
+
+
+class ScanProfiler:
+    """
+    Opt-in per-scan profiling and slow-scan capture for QRDecisionEngine
+    """
+
+    def __init__(
+        self,
+        capture_dir: str = "logs/slow_scans",
+        sample_rate: float = 0.01,
+        slow_threshold_ms: float = 500.0,
+        max_captures: int = 200,
+        trace_memory: bool = False,
+        top_allocations: int = 10
+    ):
+        """
+        Args:
+            capture_dir (str): Directory that captures are written to
+            sample_rate (float): Fraction of scans run under cProfile
+            slow_threshold_ms (float): Scans slower than this keep their
+                input image, payload and stage breakdown
+            max_captures (int): Oldest captures are removed beyond this count
+            trace_memory (bool): Also record tracemalloc peaks for sampled scans
+            top_allocations (int): Allocation sites kept per traced scan
+        """
+        self.capture_dir = Path(capture_dir)
+        self.capture_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_captures = max_captures
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+
+        self._lock = threading.Lock()
+        self._traced_scans = 0
+        self._owns_tracemalloc = False
+
+        # From Python 3.12 cProfile hooks every thread through sys.monitoring
+        # and only one profiler may be active per process, so at most one
+        # scan is profiled at a time
+        self._profile_lock = threading.Lock()
+
+    # ---------- PUBLIC API ----------
+
+    def start_scan(self) -> ScanCapture:
+        """
+        Starts timing a scan and, if it is sampled, profiling it.
+
+        A sampled scan that overlaps one already being profiled, or that
+        finds another profiling tool active, runs unsampled instead.
+        """
+        if random.random() >= self.sample_rate:
+            return ScanCapture(sampled=False)
+
+        if not self._profile_lock.acquire(blocking=False):
+            return ScanCapture(sampled=False)
+
+        traced = self.trace_memory and self._start_tracing()
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool is already active (Python 3.12+)
+            if traced:
+                with self._lock:
+                    self._release_tracing()
+            self._profile_lock.release()
+            return ScanCapture(sampled=False)
+
+        return ScanCapture(sampled=True, profile=profile, traced=traced)
+
+    def finish_scan(
+        self,
+        capture: ScanCapture,
+        image_path: str = None,
+        payload: str = None,
+        result: dict = None,
+        timeline: list = None,
+        stage_timings: dict = None,
+        error: str = None
+    ) -> float:
+        """
+        Stops profiling and writes a capture for sampled or slow scans
+
+        Must be called for every started scan, including scans that raised
+        (error describes the exception), or tracemalloc is never stopped.
+
+        Returns:
+            float: Total scan time in milliseconds
+        """
+        if capture.profile is not None:
+            capture.profile.disable()
+            self._profile_lock.release()
+
+        elapsed_ms = (time.perf_counter() - capture.started) * 1000
+        memory = self._stop_tracing() if capture.traced else None
+
+        slow = elapsed_ms >= self.slow_threshold_ms
+        if not (slow or capture.sampled):
+            return elapsed_ms
+
+        meta = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "elapsed_ms": round(elapsed_ms, 3),
+            "slow": slow,
+            "sampled": capture.sampled,
+            "decision": (result or {}).get("decision"),
+            "stage_timings_ms": stage_timings or {},
+            "error": error,
+            "memory": memory,
+        }
+
+        # Inputs are only retained for slow scans, where they are needed
+        # to reproduce the problem
+        if slow:
+            meta["payload"] = payload
+            meta["decision_timeline"] = timeline
+
+        self._write_capture(meta, capture.profile, image_path if slow else None)
+        return elapsed_ms
+
+    # ---------- INTERNAL HELPERS ----------
+
+    def _start_tracing(self) -> bool:
+        # tracemalloc is process-wide; it is shared by concurrently traced
+        # scans and stopped when the last one finishes
+        with self._lock:
+            if self._traced_scans == 0:
+                if tracemalloc.is_tracing():
+                    self._owns_tracemalloc = False
+                else:
+                    tracemalloc.start()
+                    self._owns_tracemalloc = True
+                tracemalloc.reset_peak()
+
+            self._traced_scans += 1
+            return True
+
+    def _stop_tracing(self) -> dict:
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:self.top_allocations]
+            self._release_tracing()
+
+        return {
+            "peak_bytes": peak,
+            "top_allocations": [
+                {"site": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                for stat in top
+            ],
+        }
+
+    def _release_tracing(self):
+        # Caller holds self._lock
+        self._traced_scans -= 1
+        if self._traced_scans == 0 and self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    def _write_capture(self, meta: dict, profile: cProfile.Profile, image_path: str):
+        name = "{}_{}".format(datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"), uuid.uuid4().hex[:8])
+        target = self.capture_dir / name
+        target.mkdir()
+
+        if profile is not None:
+            profile.dump_stats(str(target / "profile.pstats"))
+
+        if image_path and os.path.isfile(image_path):
+            meta["image_file"] = "input" + Path(image_path).suffix
+            shutil.copyfile(image_path, target / meta["image_file"])
+
+        with open(target / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            # Capture names start with a UTC timestamp, so they sort oldest first
+            captures = sorted(p for p in self.capture_dir.iterdir() if p.is_dir())
+            for old in captures[:max(0, len(captures) - self.max_captures)]:
+                shutil.rmtree(old, ignore_errors=True)
+
+
+# ---------- REPORTING ----------
+
+def summarize_captures(capture_dir: str) -> dict:
+    """
+    Aggregates stage breakdowns across all captures in a directory
+    """
+    stages = {}
+    summary = {"captures": 0, "slow": 0, "sampled": 0, "stages": stages}
+
+    for meta_file in sorted(Path(capture_dir).glob("*/meta.json")):
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        summary["captures"] += 1
+        summary["slow"] += 1 if meta.get("slow") else 0
+        summary["sampled"] += 1 if meta.get("sampled") else 0
+
+        for stage, ms in meta.get("stage_timings_ms", {}).items():
+            totals = stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            totals["count"] += 1
+            totals["total_ms"] += ms
+            totals["max_ms"] = max(totals["max_ms"], ms)
+
+    for totals in stages.values():
+        totals["mean_ms"] = round(totals["total_ms"] / totals["count"], 3)
+        totals["total_ms"] = round(totals["total_ms"], 3)
+
+    return summary
+
+
+def load_profiles(capture_dir: str):
+    """
+    Merges every captured cProfile into one pstats.Stats, or None if there are none
+    """
+    profile_files = [str(p) for p in sorted(Path(capture_dir).glob("*/profile.pstats"))]
+    if not profile_files:
+        return None
+    return pstats.Stats(*profile_files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate hot spots from captured QR scans")
+    parser.add_argument("capture_dir", nargs="?", default="logs/slow_scans")
+    parser.add_argument("--top", type=int, default=20, help="Functions listed per ranking")
+    args = parser.parse_args()
+
+    summary = summarize_captures(args.capture_dir)
+
+    print("=== CAPTURES ===")
+    print(f"total: {summary['captures']}  slow: {summary['slow']}  sampled: {summary['sampled']}")
+
+    print("\n=== STAGE BREAKDOWN (ms) ===")
+    by_total = sorted(summary["stages"].items(), key=lambda item: -item[1]["total_ms"])
+    for stage, totals in by_total:
+        print(f"{stage:<22} mean {totals['mean_ms']:>10.3f}  max {totals['max_ms']:>10.3f}  n={totals['count']}")
+
+    stats = load_profiles(args.capture_dir)
+    if stats is None:
+        print("\nNo cProfile captures found.")
+        return
+
+    print("\n=== HOT SPOTS (cumulative) ===")
+    stats.sort_stats("cumulative").print_stats(args.top)
+
+    print("=== HOT SPOTS (self time) ===")
+    stats.sort_stats("tottime").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
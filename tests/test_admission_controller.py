@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+# pyzbar raises a plain ImportError when the system zbar library is missing
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+from core.admission_controller import QRAdmissionController, DegradationLevel
+from core.decision_engine import QRDecisionEngine, DecisionAction
+from core.explainability_engine import QRExplainabilityEngine
+
+
+class _FakeEngine:
+    """
+    Stands in for QRDecisionEngine: records scan options and can hold
+    scans in flight until released
+    """
+
+    OPTIONAL_STAGES = QRDecisionEngine.OPTIONAL_STAGES
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.explain_engine = QRExplainabilityEngine()
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = []
+
+    def analyze_qr(self, image_path, **options):
+        self.calls.append(options)
+        time.sleep(self.delay)
+        self.release.wait(timeout=5)
+        return {"decision": DecisionAction.ALLOW, "risk_level": "LOW"}
+
+
+def _hold_inflight(controller, engine, count):
+    """
+    Starts count more scans that stay in flight until engine.release is set
+    """
+    engine.release.clear()
+    threads = []
+    inflight = controller.metrics()["inflight"]
+
+    for expected in range(inflight + 1, inflight + count + 1):
+        thread = threading.Thread(target=controller.analyze_qr, args=("qr.png",))
+        thread.start()
+        threads.append(thread)
+
+        deadline = time.monotonic() + 5
+        while controller.metrics()["inflight"] < expected:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+    return threads
+
+
+def _release(engine, threads):
+    engine.release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_slow_sequential_scans_are_not_overload():
+    engine = _FakeEngine(delay=0.02)
+    controller = QRAdmissionController(engine, latency_target_ms=5)
+
+    for _ in range(5):
+        result = controller.analyze_qr("qr.png")
+        assert result["degradation_level"] == "NORMAL"
+
+    assert engine.calls == [{}] * 5
+    assert controller.metrics()["latency_ms"] > 5
+    assert controller.current_level() == DegradationLevel.NORMAL
+
+
+def test_levels_step_up_with_inflight_scans():
+    engine = _FakeEngine()
+    controller = QRAdmissionController(engine, max_inflight=4)
+
+    levels = []
+    threads = []
+    for _ in range(4):
+        levels.append(controller.current_level())
+        threads += _hold_inflight(controller, engine, 1)
+    levels.append(controller.current_level())
+    _release(engine, threads)
+
+    assert levels == [
+        DegradationLevel.NORMAL,
+        DegradationLevel.NORMAL,
+        DegradationLevel.SKIP_OPTIONAL,
+        DegradationLevel.REDUCED_DECODE,
+        DegradationLevel.SHED,
+    ]
+    assert engine.calls == [
+        {},
+        {},
+        {"skip_stages": engine.OPTIONAL_STAGES},
+        {"skip_stages": engine.OPTIONAL_STAGES, "pixel_budget": controller.reduced_pixel_budget},
+    ]
+
+
+def test_shed_returns_warn_without_running_the_engine():
+    engine = _FakeEngine()
+    controller = QRAdmissionController(engine, max_inflight=2)
+
+    threads = _hold_inflight(controller, engine, 2)
+    result = controller.analyze_qr("qr.png")
+    _release(engine, threads)
+
+    assert len(engine.calls) == 2
+    assert result["decision"] == DecisionAction.WARN
+    assert result["risk_level"] == "MEDIUM"
+    assert result["degradation_level"] == "SHED"
+    assert any("heavy load" in reason for reason in result["why_dangerous"])
+
+
+def test_latency_raises_level_only_under_concurrency():
+    engine = _FakeEngine()
+    controller = QRAdmissionController(engine, max_inflight=32, latency_target_ms=100)
+    controller._latency_ms = 250.0
+
+    assert controller.current_level() == DegradationLevel.NORMAL
+
+    threads = _hold_inflight(controller, engine, 1)
+    assert controller.current_level() == DegradationLevel.NORMAL
+
+    threads += _hold_inflight(controller, engine, 2)
+    _release(engine, threads)
+
+    assert engine.calls[:2] == [{}, {}]
+    assert engine.calls[2]["audit_sample_rate"] == controller.audit_sample_rate
+
+
+def test_recovers_and_counts_scans_by_level():
+    engine = _FakeEngine()
+    controller = QRAdmissionController(engine, max_inflight=2)
+
+    threads = _hold_inflight(controller, engine, 2)
+    controller.analyze_qr("qr.png")
+    _release(engine, threads)
+
+    assert controller.current_level() == DegradationLevel.NORMAL
+    assert controller.analyze_qr("qr.png")["degradation_level"] == "NORMAL"
+
+    metrics = controller.metrics()
+    assert metrics["inflight"] == 0
+    assert metrics["degradation_level"] == "NORMAL"
+    assert metrics["scans_by_level"] == {
+        "NORMAL": 2,
+        "SKIP_OPTIONAL": 1,
+        "REDUCED_DECODE": 0,
+        "SAMPLED_AUDIT": 0,
+        "SHED": 1,
+    }
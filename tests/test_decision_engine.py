@@ -0,0 +1,156 @@
+import json
+import threading
+import tracemalloc
+
+import pytest
+
+# pyzbar raises a plain ImportError when the system zbar library is missing
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+from core.audit_logger import QRAuditLogger
+from core.decision_engine import QRDecisionEngine, DecisionAction
+from core.decision_timeline import DecisionTimeline
+from core.risk_engine import RiskResult
+from core.scan_profiler import ScanProfiler
+
+
+SAFE_UPI = "upi://pay?pa=ramesh.store@oksbi&pn=Ramesh%20Store&am=150"
+
+
+def _engine(tmp_path, **kwargs):
+    logger = QRAuditLogger(log_file=str(tmp_path / "audit.log"))
+    return QRDecisionEngine(audit_logger=logger, stage_timing=True, **kwargs)
+
+
+def test_upi_parse_failure_blocks_without_scam_category(tmp_path):
+    engine = _engine(tmp_path)
+    timeline = DecisionTimeline()
+
+    result = engine.analyze_payload("upi://pay?pn=Shop", timeline)
+
+    assert result["decision"] == DecisionAction.BLOCK
+    assert result["scam_category"] is None
+    assert "RISK_ANALYSIS" not in result["stage_timings_ms"]
+    assert [step["stage"] for step in timeline.export()] == ["CLASSIFY", "PARSE", "DECISION"]
+
+
+def test_heuristic_block_halts_optional_stages(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, enable_ml=True)
+
+    def high_risk(upi_data):
+        risk = RiskResult()
+        risk.add_risk(100, "High payment amount detected")
+        return risk
+
+    monkeypatch.setattr(engine.risk_engine, "evaluate_upi", high_risk)
+
+    result = engine.analyze_payload(SAFE_UPI)
+    timings = result["stage_timings_ms"]
+
+    assert result["decision"] == DecisionAction.BLOCK
+    assert "ML_EXPLAIN" not in timings
+    assert {"VERDICT", "SCAM_CLASSIFICATION", "EXPLAIN"} <= set(timings)
+
+
+def test_disabled_stages_never_run(tmp_path):
+    engine = _engine(tmp_path, disabled_stages=("SCAM_CLASSIFICATION",))
+
+    result = engine.analyze_payload(SAFE_UPI)
+
+    assert "SCAM_CLASSIFICATION" not in result["stage_timings_ms"]
+    assert result["scam_category"] is None
+
+
+@pytest.mark.parametrize("stages", [("PARSE",), ("RISK_ANALYSIS",), ("VERDICT",), ("BOGUS",)])
+def test_required_or_unknown_stages_cannot_be_disabled(tmp_path, stages):
+    with pytest.raises(ValueError, match="disabled_stages"):
+        _engine(tmp_path, disabled_stages=stages)
+
+
+def test_required_stages_cannot_be_skipped_per_scan(tmp_path):
+    engine = _engine(tmp_path)
+
+    with pytest.raises(ValueError, match="skip_stages.*'DECODE'"):
+        engine.scan_qr("unused.png", skip_stages=("DECODE", "ML_SCORING"))
+
+
+def test_ml_is_off_by_default(tmp_path):
+    engine = _engine(tmp_path)
+
+    result = engine.analyze_payload(SAFE_UPI)
+
+    assert result["decision"] == DecisionAction.ALLOW
+    assert not set(engine.OPTIONAL_STAGES) & set(result["stage_timings_ms"])
+    assert engine.versions["model_version"] is None
+
+
+def test_timeline_follows_stage_order(tmp_path):
+    engine = _engine(tmp_path, enable_ml=True)
+    expected = None
+
+    for _ in range(20):
+        timeline = DecisionTimeline()
+        engine.analyze_payload(SAFE_UPI, timeline)
+
+        steps = timeline.export()
+        stages = [step["stage"] for step in steps]
+        assert all(step["elapsed_ms"] >= 0 for step in steps)
+
+        expected = expected or stages
+        assert stages == expected
+
+    assert stages[0] == "CLASSIFY"
+    assert stages.index("RISK_ANALYSIS") < stages.index("DECISION")
+    assert stages[-1] == "DECISION"
+
+
+def test_profiler_capture_is_finished_when_scan_raises(tmp_path, monkeypatch):
+    profiler = ScanProfiler(
+        capture_dir=str(tmp_path / "captures"),
+        sample_rate=1.0,
+        trace_memory=True
+    )
+    engine = _engine(tmp_path, profiler=profiler)
+
+    def fail(context):
+        raise RuntimeError("classifier crashed")
+
+    decode, classify = engine.pipeline.stages[:2]
+    monkeypatch.setattr(decode, "func", lambda context: {"payload": SAFE_UPI})
+    monkeypatch.setattr(classify, "func", fail)
+
+    with pytest.raises(RuntimeError, match="classifier crashed"):
+        engine.scan_qr("unused.png")
+
+    assert not tracemalloc.is_tracing()
+
+    (meta_file,) = (tmp_path / "captures").glob("*/meta.json")
+    meta = json.loads(meta_file.read_text())
+    assert meta["decision"] is None
+    assert meta["error"] == "RuntimeError: classifier crashed"
+
+
+def test_overlapping_sampled_scans_both_return_verdicts(tmp_path, monkeypatch):
+    profiler = ScanProfiler(capture_dir=str(tmp_path / "captures"), sample_rate=1.0)
+    engine = _engine(tmp_path, profiler=profiler)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def decode(context):
+        # Keeps both scans in flight at once
+        barrier.wait()
+        return {"payload": SAFE_UPI}
+
+    monkeypatch.setattr(engine.pipeline.stages[0], "func", decode)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(engine.analyze_qr("unused.png")))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [result["decision"] for result in results] == [DecisionAction.ALLOW] * 2
+    assert len(list((tmp_path / "captures").glob("*/meta.json"))) == 1
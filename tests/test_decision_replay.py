@@ -0,0 +1,101 @@
+import functools
+import json
+
+import pytest
+
+# pyzbar raises a plain ImportError when the system zbar library is missing
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+from core.audit_logger import QRAuditLogger
+from core.decision_engine import QRDecisionEngine
+from core.decision_replay import DecisionReplayer
+from core.decision_timeline import DecisionTimeline
+from core.risk_engine import QRHeuristicRiskEngine, RiskResult
+
+
+PAYLOADS = [
+    "upi://pay?pa=ramesh.store@oksbi&pn=Ramesh%20Store&am=150",
+    "https://example.com/checkout",
+    "hello world",
+]
+
+
+def _stricter_url_engine(log_file: str):
+    """
+    Candidate engine that warns on every URL
+    """
+    engine = QRDecisionEngine(audit_logger=QRAuditLogger(log_file=log_file))
+
+    def evaluate_url(url):
+        risk = RiskResult()
+        risk.add_risk(40, "Non-secure HTTP URL")
+        return risk
+
+    engine.risk_engine.evaluate_url = evaluate_url
+    return engine
+
+
+@pytest.fixture
+def audit_log(tmp_path):
+    log_file = tmp_path / "audit.log"
+    logger = QRAuditLogger(log_file=str(log_file), include_payload=True, include_timeline=True)
+    engine = QRDecisionEngine(audit_logger=logger)
+
+    for payload in PAYLOADS:
+        timeline = DecisionTimeline()
+        engine.audit(engine.analyze_payload(payload, timeline), payload, timeline)
+
+    # Written without a payload, e.g. by a logger without include_payload
+    QRAuditLogger(log_file=str(log_file)).log({"decision": "ALLOW", "risk_level": "LOW"})
+
+    # A crash during a write leaves a truncated last line
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write('{"decision": "BLO')
+
+    return log_file
+
+
+def test_audit_records_carry_payload_and_versions(audit_log):
+    with open(audit_log, encoding="utf-8") as f:
+        record = json.loads(f.readline())
+
+    assert record["payload"] == PAYLOADS[0]
+    assert len(record["payload_sha256"]) == 64
+    assert record["rules_version"] == QRHeuristicRiskEngine.RULES_VERSION
+    assert "model_version" in record
+    assert record["decision_timeline"][-1]["stage"] == "DECISION"
+
+
+def test_replay_reports_changed_verdicts(audit_log, tmp_path):
+    replayer = DecisionReplayer(
+        engine_factory=functools.partial(_stricter_url_engine, str(tmp_path / "candidate.log")),
+        workers=1
+    )
+
+    report = replayer.replay(str(audit_log))
+
+    assert report["records"] == 4
+    assert report["replayed"] == 3
+    assert report["skipped_no_payload"] == 1
+    assert report["malformed"] == 1
+    assert report["verdict_changes"] == 1
+    assert report["transitions"] == {"ALLOW->WARN": 1}
+
+    (diff,) = report["diffs"]
+    assert diff["line"] == 2
+    assert diff["candidate"] == {"decision": "WARN", "risk_level": "MEDIUM"}
+    assert "RISK_ANALYSIS" in report["stage_latency_ms"]
+
+
+def test_replay_with_worker_processes(audit_log, tmp_path):
+    candidate_logger = QRAuditLogger(log_file=str(tmp_path / "candidate.log"))
+    replayer = DecisionReplayer(
+        engine_factory=functools.partial(QRDecisionEngine, audit_logger=candidate_logger),
+        workers=2,
+        chunksize=1
+    )
+
+    report = replayer.replay(str(audit_log))
+
+    assert report["replayed"] == 3
+    assert report["verdict_changes"] == 0
@@ -0,0 +1,97 @@
+import gc
+import json
+import multiprocessing
+
+import pytest
+
+# pyzbar raises a plain ImportError when the system zbar library is missing
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+if "fork" not in multiprocessing.get_all_start_methods():
+    pytest.skip("QREngineServer needs the fork start method", allow_module_level=True)
+
+from core.audit_logger import QRAuditLogger
+from core.decision_engine import QRDecisionEngine
+from core.engine_server import QREngineServer, SharedVerdictCache
+
+
+PAYLOAD = "upi://pay?pa=ramesh.store@oksbi&pn=Ramesh%20Store&am=150"
+
+
+@pytest.fixture
+def manager():
+    manager = multiprocessing.get_context("fork").Manager()
+    yield manager
+    manager.shutdown()
+
+
+def _counting_engine_factory(tmp_path):
+    decodes_file = tmp_path / "decodes.log"
+
+    def factory():
+        engine = QRDecisionEngine(
+            audit_logger=QRAuditLogger(
+                log_file=str(tmp_path / "audit.log"),
+                include_payload=True
+            )
+        )
+
+        # Runs in the forked workers; one line per real (uncached) decode
+        def decode_qr(image_path, pixel_budget=None):
+            with open(decodes_file, "a") as f:
+                f.write(image_path + "\n")
+            return PAYLOAD
+
+        engine.decoder.decode_qr = decode_qr
+        return engine
+
+    return factory, decodes_file
+
+
+def test_cache_evicts_oldest_entries(manager):
+    cache = SharedVerdictCache(manager, max_entries=2)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert (cache.get("b"), cache.get("c")) == (2, 3)
+
+
+def test_workers_share_engine_and_cache(tmp_path):
+    image = tmp_path / "qr.png"
+    image.write_bytes(b"same image bytes")
+    factory, decodes_file = _counting_engine_factory(tmp_path)
+
+    frozen_before = gc.get_freeze_count()
+
+    with QREngineServer(engine_factory=factory, workers=2) as server:
+        first = server.analyze_qr(str(image))
+        results = server.analyze_many([str(image)] * 8)
+        report = server.memory_report()
+
+        assert len(server.cache) == 1
+
+    assert gc.get_freeze_count() == frozen_before
+
+    # Only the first scan decoded the image; the rest were cache hits
+    assert decodes_file.read_text().splitlines() == [str(image)]
+    assert results == [first] * 8
+
+    # Cache hits are still audited with their payload
+    with open(tmp_path / "audit.log") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 9
+    assert all(record["payload"] == PAYLOAD for record in records)
+
+    assert report["parent_rss"] > 0
+    assert report["workers"]
+    assert all(rss > 0 for rss in report["workers"].values())
+
+
+def test_analyze_requires_start():
+    with pytest.raises(RuntimeError, match="not started"):
+        QREngineServer(workers=1).analyze_qr("qr.png")
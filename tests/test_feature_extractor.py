@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.feature_extractor import QRFeatureExtractor
+from core.ml_risk_scorer import MLRiskScorer
+
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "model" / "qr_risk_model.pkl"
+
+UPI_RECORDS = [
+    {"payee_address": "abc@okaxis", "payee_name": "", "amount": 6000.0},
+    {"payee_address": "abc@okaxis", "payee_name": "Payment", "amount": 7000.0},
+    {"payee_address": "ramesh.store@oksbi", "payee_name": "Ramesh Store", "amount": None},
+    {"payee_address": "x-y@upi", "payee_name": " STORE ", "amount": 150.0},
+]
+
+URLS = [
+    "https://bit.ly/abc",
+    "http://192.168.1.10/pay",
+    "https://example.com/checkout?id=1",
+]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    if not MODEL_PATH.exists():
+        pytest.skip("trained model not available")
+    return MLRiskScorer(model_path=str(MODEL_PATH))
+
+
+def test_upi_matrix_matches_per_payload_features():
+    extractor = QRFeatureExtractor()
+    matrix = extractor.extract_upi_feature_matrix(UPI_RECORDS)
+
+    assert matrix.shape == (len(UPI_RECORDS), len(extractor.UPI_FEATURE_SCHEMA))
+    assert matrix.dtype == np.float64
+
+    for row, record in zip(matrix, UPI_RECORDS):
+        features = extractor.extract_upi_features(record)
+        assert list(features) == list(extractor.UPI_FEATURE_SCHEMA)
+        assert list(row) == [features[name] for name in extractor.UPI_FEATURE_SCHEMA]
+
+
+def test_url_matrix_matches_per_payload_features():
+    extractor = QRFeatureExtractor()
+    matrix = extractor.extract_url_feature_matrix(URLS)
+
+    for row, url in zip(matrix, URLS):
+        features = extractor.extract_url_features(url)
+        assert list(row) == [features[name] for name in extractor.URL_FEATURE_SCHEMA]
+
+    assert matrix[:, 0].tolist() == [1, 0, 0]  # has_shortener
+    assert matrix[:, 2].tolist() == [0, 1, 0]  # is_ip_url
+
+
+def test_empty_batches_keep_schema_width():
+    extractor = QRFeatureExtractor()
+
+    assert extractor.extract_upi_feature_matrix([]).shape == (0, 5)
+    assert extractor.extract_url_feature_matrix([]).shape == (0, 4)
+
+
+def test_upi_schema_matches_model_training_columns(scorer):
+    assert list(QRFeatureExtractor.UPI_FEATURE_SCHEMA) == list(scorer.model.feature_names_in_)
+    assert scorer.feature_names == list(scorer.model.feature_names_in_)
+
+
+def test_batch_scores_match_single_scores(scorer):
+    extractor = QRFeatureExtractor()
+    batch = scorer.predict_risk_batch(extractor.extract_upi_feature_matrix(UPI_RECORDS))
+
+    single = [
+        scorer.predict_risk(extractor.extract_upi_features(record))["risk_probability"]
+        for record in UPI_RECORDS
+    ]
+
+    assert batch["model_used"] is True
+    assert batch["risk_probability"].tolist() == single
+
+
+def test_batch_scoring_empty_matrix(scorer):
+    result = scorer.predict_risk_batch(QRFeatureExtractor().extract_upi_feature_matrix([]))
+
+    assert result["model_used"] is True
+    assert result["risk_probability"].shape == (0,)
+
+
+def test_batch_scoring_rejects_wrong_width(scorer):
+    url_matrix = QRFeatureExtractor().extract_url_feature_matrix(URLS)
+
+    with pytest.raises(ValueError, match="expected"):
+        scorer.predict_risk_batch(url_matrix)
@@ -0,0 +1,165 @@
+import threading
+
+import pytest
+
+from core.pipeline import PipelineStage, StagePipeline
+
+
+def _stage(name, outputs=None, ran=None, **kwargs):
+    def func(context):
+        if ran is not None:
+            ran.append(name)
+        return dict(outputs or {})
+
+    return PipelineStage(name, func, outputs=tuple(outputs or ()), **kwargs)
+
+
+def test_stages_run_in_dependency_order():
+    ran = []
+    pipeline = StagePipeline([
+        _stage("C", {"c": 3}, ran, inputs=("b",)),
+        _stage("B", {"b": 2}, ran, inputs=("a",)),
+        _stage("A", {"a": 1}, ran),
+    ])
+
+    context = {}
+    timings = pipeline.run(context)
+
+    assert ran == ["A", "B", "C"]
+    assert context == {"a": 1, "b": 2, "c": 3}
+    assert set(timings) == {"A", "B", "C"}
+
+
+def test_independent_stages_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(context):
+        # Deadlocks (and times out) unless both stages run at once
+        barrier.wait()
+        return {}
+
+    pipeline = StagePipeline([
+        PipelineStage("LEFT", wait),
+        PipelineStage("RIGHT", wait),
+    ], max_workers=2)
+
+    assert set(pipeline.run({})) == {"LEFT", "RIGHT"}
+
+
+def test_serial_run_stays_on_calling_thread():
+    threads = []
+
+    def record(context):
+        threads.append(threading.current_thread())
+        return {}
+
+    pipeline = StagePipeline([PipelineStage("A", record), PipelineStage("B", record)])
+    pipeline.run({}, parallel=False)
+
+    assert threads == [threading.current_thread()] * 2
+
+
+def test_optional_input_is_waited_for_when_it_can_be_produced():
+    seen = {}
+
+    def consume(context):
+        seen["extra"] = context.get("extra")
+        return {}
+
+    pipeline = StagePipeline([
+        PipelineStage("CONSUME", consume, inputs=("a",), optional_inputs=("extra",)),
+        _stage("EXTRA", {"extra": "x"}, inputs=("a",)),
+        _stage("A", {"a": 1}),
+    ])
+
+    pipeline.run({})
+    assert seen == {"extra": "x"}
+
+
+def test_optional_input_is_not_waited_for_when_producer_is_disabled():
+    ran = []
+    pipeline = StagePipeline([
+        _stage("CONSUME", ran=ran, optional_inputs=("extra",)),
+        _stage("EXTRA", {"extra": "x"}, ran, enabled=False),
+    ])
+
+    pipeline.run({})
+    assert ran == ["CONSUME"]
+
+
+def test_halt_skips_stages_that_are_not_always_run():
+    ran = []
+    pipeline = StagePipeline([
+        _stage("CHECK", {"blocked": True}, ran),
+        _stage("OPTIONAL", ran=ran, inputs=("blocked",)),
+        _stage("FINAL", ran=ran, inputs=("blocked",), always_run=True),
+    ], halt_when=lambda context: context.get("blocked"))
+
+    timings = pipeline.run({})
+
+    assert ran == ["CHECK", "FINAL"]
+    assert "OPTIONAL" not in timings
+
+
+def test_disabled_and_skipped_stages_do_not_run():
+    ran = []
+    pipeline = StagePipeline([
+        _stage("A", ran=ran),
+        _stage("B", ran=ran, enabled=False),
+        _stage("C", ran=ran),
+    ])
+
+    pipeline.run({}, skip=("C",))
+    assert ran == ["A"]
+
+    # skip only applies to the run it was passed to
+    pipeline.run({})
+    assert ran == ["A", "A", "C"]
+
+
+def test_stages_with_unreachable_inputs_are_dropped():
+    ran = []
+    pipeline = StagePipeline([
+        _stage("A", {"a": 1}, ran),
+        _stage("NEEDS_MISSING", {"b": 2}, ran, inputs=("missing",)),
+        _stage("NEEDS_B", ran=ran, inputs=("b",)),
+    ])
+
+    timings = pipeline.run({})
+
+    assert ran == ["A"]
+    assert set(timings) == {"A"}
+
+
+def test_dependency_cycle_raises():
+    pipeline = StagePipeline([
+        _stage("A", {"a": 1}, inputs=("b",)),
+        _stage("B", {"b": 2}, inputs=("a",)),
+    ])
+
+    with pytest.raises(RuntimeError, match="depend on each other: A, B"):
+        pipeline.run({})
+
+
+def test_duplicate_stage_names_are_rejected():
+    with pytest.raises(ValueError, match="unique"):
+        StagePipeline([_stage("A"), _stage("A")])
+
+
+def test_on_stage_start_runs_on_the_stage_thread():
+    started = {}
+
+    def on_start(stage, context):
+        started[stage.name] = threading.current_thread()
+
+    def check(context):
+        assert started[context["name"]] is threading.current_thread()
+        return {}
+
+    pipeline = StagePipeline([
+        PipelineStage("LEFT", lambda context: check({"name": "LEFT"})),
+        PipelineStage("RIGHT", lambda context: check({"name": "RIGHT"})),
+    ], max_workers=2, on_stage_start=on_start)
+
+    pipeline.run({})
+    assert set(started) == {"LEFT", "RIGHT"}
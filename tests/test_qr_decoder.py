@@ -0,0 +1,203 @@
+import pytest
+from PIL import Image, ImageFile
+
+# pyzbar raises a plain ImportError when the system zbar library is missing
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+from core import qr_decoder
+from core.qr_decoder import QRDecoder, QRDecodeError
+
+
+class _Decoded:
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class _ScanRecorder(list):
+    """
+    Stands in for pyzbar: records scanned sizes and only "finds" a QR
+    in frames of at least min_pixels
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.min_pixels = None
+
+    def __call__(self, image):
+        size = image.size if isinstance(image, Image.Image) else image.shape[::-1]
+        self.append(size)
+        if self.min_pixels is not None and size[0] * size[1] >= self.min_pixels:
+            return [_Decoded(b"upi://pay?pa=shop@okaxis")]
+        return []
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    recorder = _ScanRecorder()
+    monkeypatch.setattr(qr_decoder, "decode", recorder)
+    return recorder
+
+
+@pytest.fixture
+def opens(monkeypatch):
+    calls = []
+    real_open = Image.open
+
+    def counting_open(*args, **kwargs):
+        calls.append(args[0])
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(qr_decoder.Image, "open", counting_open)
+    return calls
+
+
+def _save(tmp_path, name, size, mode="RGB"):
+    path = tmp_path / name
+    Image.new(mode, size, "white").save(path)
+    return str(path)
+
+
+def test_small_image_is_scanned_once(tmp_path, scans, opens):
+    path = _save(tmp_path, "small.png", (400, 300))
+    decoder = QRDecoder(fallback_steps=())
+
+    with pytest.raises(QRDecodeError, match="No QR code detected"):
+        decoder.decode_qr(path)
+
+    assert scans == [(400, 300)]
+    assert len(opens) == 1
+
+
+def test_large_image_escalates_from_one_decoded_frame(tmp_path, scans, opens):
+    path = _save(tmp_path, "large.png", (4000, 3000))
+    scans.min_pixels = 3_000_000
+    decoder = QRDecoder(pixel_budget=8_000_000, fallback_steps=())
+
+    assert decoder.decode_qr(path) == "upi://pay?pa=shop@okaxis"
+
+    pixels = [w * h for w, h in scans]
+    assert pixels == sorted(pixels)
+    assert pixels[0] <= 500_000
+    assert pixels[1] <= 2_000_000
+    assert pixels[-1] <= 8_000_000
+    assert len(scans) == 3
+    assert len(opens) == 1
+
+
+def test_passes_fill_their_pixel_budget(tmp_path, scans):
+    path = _save(tmp_path, "large.png", (4000, 3000))
+    decoder = QRDecoder(pixel_budget=8_000_000, fallback_steps=())
+
+    with pytest.raises(QRDecodeError):
+        decoder.decode_qr(path)
+
+    pixels = [w * h for w, h in scans]
+    for scanned, budget in zip(pixels, (500_000, 2_000_000, 8_000_000)):
+        assert 0.99 * budget <= scanned <= budget
+
+
+def test_image_just_over_budget_is_scanned_near_full_size(tmp_path, scans):
+    path = _save(tmp_path, "square.png", (3000, 3000))
+    decoder = QRDecoder(pixel_budget=8_000_000, fallback_steps=())
+
+    with pytest.raises(QRDecodeError):
+        decoder.decode_qr(path)
+
+    assert scans[-1][0] * scans[-1][1] >= 0.99 * 8_000_000
+
+
+def test_jpeg_passes_decode_only_their_own_resolution(tmp_path, scans, opens, monkeypatch):
+    path = _save(tmp_path, "photo.jpg", (4000, 3000))
+    scans.min_pixels = 3_000_000
+    decoder = QRDecoder(pixel_budget=8_000_000, fallback_steps=())
+
+    decoded = []
+    real_load = ImageFile.ImageFile.load
+
+    def recording_load(self):
+        # tile is cleared once the pixels have been decoded
+        if self.tile:
+            decoded.append(self.size)
+        return real_load(self)
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", recording_load)
+
+    assert decoder.decode_qr(path) == "upi://pay?pa=shop@okaxis"
+
+    # Each pass opens the file and decodes at a reduced DCT scale
+    assert len(scans) == 3
+    assert len(opens) == 4
+    assert [w * h for w, h in decoded] == [750_000, 3_000_000, 12_000_000]
+
+
+def test_cheap_pass_stops_escalation(tmp_path, scans):
+    path = _save(tmp_path, "large.png", (4000, 3000))
+    scans.min_pixels = 1
+    decoder = QRDecoder(fallback_steps=())
+
+    assert decoder.decode_qr(path) == "upi://pay?pa=shop@okaxis"
+    assert len(scans) == 1
+
+
+def test_frames_never_exceed_pixel_budget(tmp_path, scans):
+    path = _save(tmp_path, "palette.png", (3000, 3000), mode="P")
+    decoder = QRDecoder(pixel_budget=1_000_000, fallback_steps=())
+
+    with pytest.raises(QRDecodeError):
+        decoder.decode_qr(path)
+
+    assert all(w * h <= 1_000_000 for w, h in scans)
+
+
+def test_pixel_budget_override(tmp_path, scans):
+    path = _save(tmp_path, "large.jpg", (4000, 3000))
+    decoder = QRDecoder(pixel_budget=8_000_000, fallback_steps=())
+
+    with pytest.raises(QRDecodeError):
+        decoder.decode_qr(path, pixel_budget=400_000)
+
+    assert len(scans) == 1
+    assert scans[0][0] * scans[0][1] <= 400_000
+
+
+def test_decompression_bomb_is_rejected_before_decoding(tmp_path, scans, monkeypatch):
+    path = _save(tmp_path, "bomb.png", (2000, 2000))
+    decoder = QRDecoder(max_image_pixels=1_000_000, fallback_steps=())
+
+    def fail_load(self):
+        raise AssertionError("pixels must not be decoded")
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", fail_load)
+
+    with pytest.raises(QRDecodeError, match="maximum allowed size"):
+        decoder.decode_qr(path)
+
+    assert scans == []
+
+
+def test_missing_file():
+    with pytest.raises(QRDecodeError, match="does not exist"):
+        QRDecoder().decode_qr("does/not/exist.png")
+
+
+def test_fallback_order_follows_recent_successes(tmp_path, scans):
+    path = _save(tmp_path, "blurred.png", (400, 300))
+    decoder = QRDecoder(fallback_steps=("invert", "opencv"))
+    tried = []
+
+    def invert(gray):
+        tried.append("invert")
+        return None
+
+    def opencv(gray):
+        tried.append("opencv")
+        return "upi://pay?pa=shop@okaxis"
+
+    decoder._fallback_invert = invert
+    decoder._fallback_opencv = opencv
+
+    assert decoder.decode_qr(path) == "upi://pay?pa=shop@okaxis"
+    assert decoder.decode_qr(path) == "upi://pay?pa=shop@okaxis"
+
+    assert tried == ["invert", "opencv", "opencv"]
+    assert decoder.fallback_stats() == {"opencv": 2}
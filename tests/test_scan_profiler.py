@@ -0,0 +1,90 @@
+import cProfile
+import json
+import threading
+import tracemalloc
+
+from core import scan_profiler
+from core.scan_profiler import ScanProfiler, summarize_captures
+
+
+def _profiler(tmp_path, **kwargs):
+    return ScanProfiler(capture_dir=str(tmp_path / "captures"), sample_rate=1.0, **kwargs)
+
+
+def test_overlapping_sampled_scans_profile_one_at_a_time(tmp_path):
+    profiler = _profiler(tmp_path, trace_memory=True)
+
+    first = profiler.start_scan()
+    second = profiler.start_scan()
+
+    assert first.sampled
+    assert not second.sampled and second.profile is None
+
+    profiler.finish_scan(second, result={"decision": "ALLOW"})
+    profiler.finish_scan(first, result={"decision": "ALLOW"})
+
+    assert not tracemalloc.is_tracing()
+
+    third = profiler.start_scan()
+    assert third.sampled
+    profiler.finish_scan(third)
+
+
+def test_concurrent_sampled_scans_all_finish(tmp_path):
+    profiler = _profiler(tmp_path)
+    barrier = threading.Barrier(4, timeout=5)
+    captures = []
+    errors = []
+
+    def scan():
+        try:
+            capture = profiler.start_scan()
+            captures.append(capture)
+            barrier.wait()
+            profiler.finish_scan(capture, result={"decision": "ALLOW"})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=scan) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sum(capture.sampled for capture in captures) == 1
+    assert summarize_captures(str(tmp_path / "captures"))["sampled"] == 1
+
+
+def test_scan_runs_unsampled_when_another_profiler_is_active(tmp_path, monkeypatch):
+    class BusyProfile(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError("Another profiling tool is already active")
+
+    profiler = _profiler(tmp_path, trace_memory=True)
+    monkeypatch.setattr(scan_profiler.cProfile, "Profile", BusyProfile)
+
+    capture = profiler.start_scan()
+
+    assert not capture.sampled
+    assert not tracemalloc.is_tracing()
+    assert profiler._traced_scans == 0
+
+    monkeypatch.undo()
+    capture = profiler.start_scan()
+    assert capture.sampled
+    profiler.finish_scan(capture)
+
+
+def test_failed_scan_capture_records_error(tmp_path):
+    profiler = _profiler(tmp_path)
+
+    capture = profiler.start_scan()
+    profiler.finish_scan(capture, stage_timings={"DECODE": 1.5}, error="RuntimeError: boom")
+
+    (meta_file,) = (tmp_path / "captures").glob("*/meta.json")
+    meta = json.loads(meta_file.read_text())
+
+    assert meta["decision"] is None
+    assert meta["error"] == "RuntimeError: boom"
+    assert meta["stage_timings_ms"] == {"DECODE": 1.5}